@@ -0,0 +1,353 @@
+"""
+Drive a running Streamlit app the way a browser tab does, without a browser.
+
+`AppServer` starts `streamlit run app.py` on a free port and reads the
+server process's CPU time and RSS from /proc (Linux). `AppSession` opens
+the app's websocket and sends reruns carrying widget values, for the whole
+page or for one fragment. It records how long each rerun took and how many
+bytes came back. Widgets are looked up by their key, or by their label when
+they have no key.
+
+    server = AppServer().start()
+    session = await AppSession.open(server.url)
+    await session.rerun()
+    await session.choose_page(1)
+    session.set("domain", "finance")
+    result = await session.rerun(session.fragment_of("domain"))
+    assert "finance" in session.preview.text()
+"""
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.websocket import websocket_connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+# Widget element type -> WidgetState field holding its value
+VALUE_FIELDS = {
+    "text_area": "string_value",
+    "text_input": "string_value",
+    "checkbox": "bool_value",
+    "selectbox": "int_value",
+    "number_input": "int_value",
+    "component_instance": "json_value",
+    "button": "trigger_value",
+    "download_button": "trigger_value",
+}
+QUICKACK = getattr(socket, "TCP_QUICKACK", None)
+FINISHED = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class AppServer:
+    """A `streamlit run` subprocess serving one app file."""
+
+    def __init__(self, script=os.path.join(ROOT, "app.py"), port=None, env=None, options=()):
+        self.script = script
+        self.port = port or free_port()
+        self.env = env
+        # Extra `streamlit run` flags, e.g. ["--runner.postScriptGC", "false"]
+        self.options = list(options)
+        self.process = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout=60):
+        """Start the server and wait until it answers its health check. Returns self."""
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", self.script,
+             "--server.headless", "true", "--server.port", str(self.port),
+             "--server.address", "127.0.0.1", "--browser.gatherUsageStats", "false",
+             "--server.fileWatcherType", "none", *self.options],
+            cwd=os.path.dirname(self.script),
+            env={**os.environ, **(self.env or {})},
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                with urllib.request.urlopen(f"{self.url}/_stcore/health", timeout=1):
+                    return self
+            except OSError:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError("streamlit server did not start")
+                time.sleep(0.1)
+
+    def cpu_seconds(self):
+        """User plus system CPU time used by the server process so far."""
+        with open(f"/proc/{self.process.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+    def rss_bytes(self):
+        with open(f"/proc/{self.process.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class Widget:
+    __slots__ = ("id", "kind", "key", "label", "fragment_id", "args")
+
+    def __init__(self, id, kind, key, label, fragment_id, args=None):
+        self.id = id
+        self.kind = kind
+        self.key = key
+        self.label = label
+        self.fragment_id = fragment_id
+        self.args = args
+
+
+class RerunResult:
+    """What one rerun cost, as seen by the client."""
+    __slots__ = ("seconds", "bytes", "messages", "status")
+
+    def __init__(self, seconds, bytes, messages, status):
+        self.seconds = seconds
+        self.bytes = bytes
+        self.messages = messages
+        self.status = status
+
+
+def widget_key(widget_id):
+    # Streamlit appends the user key to the IDs of keyed widgets: "$$ID-<hash>-<key>"
+    if widget_id.startswith("$$ID-"):
+        key = widget_id.split("-", 2)[2]
+        return None if key == "None" else key
+    return None
+
+
+class PreviewMirror:
+    """
+    The prompt as the preview frame in the browser holds it, rebuilt from the
+    updates sent to the preview and to its feed frames (preview_component/index.html).
+    """
+
+    def __init__(self):
+        self.sections = []
+        self.version = 0
+        self.separator = "\n\n"
+        # Set when an update could not be applied; the browser would ask for a resync
+        self.stale = False
+
+    def apply(self, update):
+        if update["version"] <= self.version:
+            return
+        if not update["full"] and (update["base"] != self.version or update["count"] != len(self.sections)):
+            self.stale = True
+            return
+        if update["full"]:
+            self.sections = [""] * update["count"]
+        for index, start, end, insert in update["ops"]:
+            old = self.sections[index]
+            self.sections[index] = old[:start] + insert + old[end:]
+        self.version = update["version"]
+        self.stale = False
+
+    def text(self):
+        """What Copy and Download would give."""
+        return self.separator.join(self.sections)
+
+
+class AppSession:
+    """One simulated browser tab."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.preview = PreviewMirror()
+        self.widgets = {}
+        self.states = {}
+        # Cacheable messages by hash; the server sends a reference when it resends one
+        self.cache = {}
+        self.bytes_received = 0
+
+    @classmethod
+    async def open(cls, url):
+        connection = await websocket_connect(
+            url.replace("http", "ws", 1) + "/_stcore/stream",
+            subprotocols=["streamlit"],
+            max_message_size=1 << 30,
+        )
+        # Send each rerun request at once; Nagle's algorithm would hold it for the server's delayed ACK
+        connection.stream.set_nodelay(True)
+        return cls(connection)
+
+    def close(self):
+        self.connection.close()
+
+    def find(self, name):
+        """
+        Returns:
+            Widget: The widget whose key is `name`, else the first one labelled `name`.
+        Raises:
+            KeyError: When no widget drawn so far matches.
+        """
+        for widget in self.widgets.values():
+            if widget.key == name:
+                return widget
+        for widget in self.widgets.values():
+            if widget.label == name:
+                return widget
+        raise KeyError(name)
+
+    def has(self, name):
+        try:
+            self.find(name)
+        except KeyError:
+            return False
+        return True
+
+    def fragment_of(self, name):
+        """ID of the fragment drawing widget `name`; "" when the widget is outside fragments."""
+        return self.find(name).fragment_id
+
+    def set(self, name, value):
+        """Give widget `name` a value for the next rerun, as if the user had changed it."""
+        widget = self.find(name)
+        state = WidgetState(id=widget.id)
+        field = VALUE_FIELDS[widget.kind]
+        setattr(state, field, json.dumps(value) if field == "json_value" else value)
+        self.states[widget.id] = state
+
+    def click(self, name):
+        self.set(name, True)
+
+    def _menu(self, languages):
+        # The two option menus are told apart by whether they offer "English"
+        for widget in self.widgets.values():
+            if widget.kind == "component_instance" and "options" in widget.args:
+                if ("English" in widget.args["options"]) == languages:
+                    return widget
+        raise KeyError("language menu" if languages else "main menu")
+
+    async def choose_page(self, index):
+        """Pick entry `index` of the main menu and rerun."""
+        menu = self._menu(languages=False)
+        self.states[menu.id] = WidgetState(id=menu.id, json_value=json.dumps(menu.args["options"][index]))
+        return await self.rerun()
+
+    async def choose_language(self, index):
+        """Pick entry `index` of the language menu (0 English, 1 Chinese) and rerun."""
+        menu = self._menu(languages=True)
+        self.states[menu.id] = WidgetState(id=menu.id, json_value=json.dumps(menu.args["options"][index]))
+        return await self.rerun()
+
+    async def resync_preview(self, key="prompt_preview"):
+        """Ask the preview for a full copy, as its frame does after a missed update, and rerun its fragment."""
+        widget = self.find(key)
+        self.states[widget.id] = WidgetState(id=widget.id, json_value=json.dumps({"resync": time.time()}))
+        return await self.rerun(widget.fragment_id)
+
+    async def rerun(self, fragment_id="", timeout=60):
+        """
+        Send the current widget values and wait for the run to finish.
+        Args:
+            fragment_id (str): Rerun only this fragment; "" reruns the whole page
+        Returns:
+            RerunResult: Time until the run finished, and the bytes and messages received.
+        """
+        message = BackMsg()
+        client = message.rerun_script
+        client.fragment_id = fragment_id
+        client.widget_states.widgets.extend(self.states.values())
+        # Buttons fire once, like in the browser
+        self.states = {i: s for i, s in self.states.items() if s.WhichOneof("value") != "trigger_value"}
+        seen = set()
+        received = 0
+        count = 0
+        start = time.perf_counter()
+        await self.connection.write_message(message.SerializeToString(), binary=True)
+        deadline = start + timeout
+        while True:
+            self._ack_now()
+            data = await asyncio.wait_for(self.connection.read_message(), max(deadline - time.perf_counter(), 0))
+            if data is None:
+                raise ConnectionError("the server closed the websocket")
+            received += len(data)
+            count += 1
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            kind = msg.WhichOneof("type")
+            if kind == "ref_hash":
+                msg = self.cache[msg.ref_hash]
+                kind = msg.WhichOneof("type")
+            elif msg.metadata.cacheable:
+                self.cache[msg.hash] = msg
+            if kind == "delta":
+                self._track(msg.delta, seen)
+            elif kind == "script_finished":
+                status = msg.script_finished
+                break
+        seconds = time.perf_counter() - start
+        self.bytes_received += received
+        if status in FINISHED:
+            # Forget values of widgets the run did not draw again, as the browser does
+            stale = [
+                i for i, w in self.widgets.items()
+                if i not in seen and (not fragment_id or w.fragment_id == fragment_id)
+            ]
+            for widget_id in stale:
+                del self.widgets[widget_id]
+                self.states.pop(widget_id, None)
+        return RerunResult(seconds, received, count, status)
+
+    def _ack_now(self):
+        # The server writes each run as several small messages without TCP_NODELAY, so every
+        # one after the first waits for our ACK; acknowledging at once keeps Linux's
+        # 40 ms delayed ACK out of the measured latency.
+        if QUICKACK is not None:
+            self.connection.stream.socket.setsockopt(socket.IPPROTO_TCP, QUICKACK, 1)
+
+    def _track(self, delta, seen):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind not in VALUE_FIELDS:
+            return
+        proto = getattr(element, kind)
+        widget_id = proto.id
+        args = {}
+        if kind == "component_instance":
+            args = json.loads(proto.json_args or "{}")
+            if args.get("mode") == "preview":
+                self.preview.separator = args["separator"]
+                self.preview.apply(args)
+            elif args.get("mode") == "feed" and args.get("update"):
+                self.preview.apply(args["update"])
+        label = getattr(proto, "label", "")
+        self.widgets[widget_id] = Widget(widget_id, kind, widget_key(widget_id), label, delta.fragment_id, args)
+        seen.add(widget_id)
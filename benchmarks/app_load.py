@@ -0,0 +1,292 @@
+"""
+Capacity report for one `streamlit run app.py` process under concurrent sessions.
+
+    python benchmarks/app_load.py --sessions 1 5 10 25 50 --duration 30 -o capacity.json
+    python benchmarks/app_load.py --url http://10.0.0.5:8501 --sessions 20    # a server started elsewhere
+
+For every concurrency level a fresh server is started and N simulated users
+open the builder through the app's websocket (see app_client.py). Each user
+then repeats a realistic mix of steps, with a random pause between them:
+filling a field, editing, adding or removing an action, toggling the
+structure checkbox, switching the language, and downloading the prompt.
+Downloading is served by the browser's copy of the prompt; the simulated
+browser rebuilds that copy and checks that it holds everything typed so far.
+
+Reported per level: reruns per second, rerun latency percentiles (overall,
+fragment-only and whole-page), websocket bytes, server CPU and RSS, and
+errors. Users and their steps are seeded, so a report can be repeated. The
+harness runs in one process; its own CPU use is reported too, since on a
+small machine it competes with the server.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_client import FINISHED, AppServer, AppSession  # noqa: E402
+from run_benchmarks import metadata, percentile  # noqa: E402
+
+# Step -> relative frequency
+STEP_WEIGHTS = {
+    "fill_field": 40,
+    "edit_action": 15,
+    "add_action": 8,
+    "remove_action": 6,
+    "toggle_structure": 6,
+    "switch_language": 3,
+    "download": 8,
+}
+TEXT_FIELDS = ("domain", "specialization", "specificGoal", "details", "constraints", "format", "unwantedResult")
+WORDS = ("market", "research", "analysis", "python", "finance", "biology", "design", "strategy", "金融", "市場", "分析")
+MAX_ACTIONS = 8
+
+
+class Recorder:
+    """Reruns and errors of every simulated user, stamped with when they finished."""
+
+    def __init__(self):
+        self.reruns = []
+        self.errors = Counter()
+        self.downloads = []
+
+    def rerun(self, step, result, scope):
+        if result.status not in FINISHED:
+            self.errors["rerun_failed"] += 1
+        self.reruns.append((time.monotonic(), step, scope, result.seconds, result.bytes))
+
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def keys_with(session, prefix):
+    return [w.key for w in session.widgets.values() if (w.key or "").startswith(prefix)]
+
+
+class User:
+    """One simulated person working in the builder."""
+
+    def __init__(self, session, rng, recorder):
+        self.session = session
+        self.rng = rng
+        self.recorder = recorder
+        self.lang = 0
+        # Field key -> value typed into it, checked against the downloaded prompt
+        self.typed = {}
+
+    async def run_in(self, key, step):
+        """Rerun the fragment drawing widget `key`, as the browser does after it changes."""
+        self.recorder.rerun(step, await self.session.rerun(self.session.fragment_of(key)), "fragment")
+
+    async def run_page(self, step, rerun):
+        self.recorder.rerun(step, await rerun, "page")
+
+    async def open(self):
+        await self.run_page("load", self.session.rerun())
+        await self.run_page("open_builder", self.session.choose_page(1))
+
+    async def fill_field(self):
+        key = self.rng.choice([k for k in TEXT_FIELDS if self.session.has(k)])
+        self.typed[key] = words(self.rng, self.rng.randint(2, 12))
+        self.session.set(key, self.typed[key])
+        await self.run_in(key, "fill_field")
+
+    async def edit_action(self):
+        key = self.rng.choice(keys_with(self.session, "action_value_"))
+        self.session.set(key, words(self.rng, self.rng.randint(1, 5)))
+        await self.run_in(key, "edit_action")
+
+    async def add_action(self):
+        if len(keys_with(self.session, "action_value_")) >= MAX_ACTIONS:
+            return await self.remove_action()
+        self.session.click("add_action")
+        await self.run_in("add_action", "add_action")
+
+    async def remove_action(self):
+        keys = keys_with(self.session, "remove_action_")
+        if not keys:
+            return await self.add_action()
+        key = self.rng.choice(keys)
+        self.session.click(key)
+        await self.run_in(key, "remove_action")
+
+    async def toggle_structure(self):
+        key = keys_with(self.session, "structure_toggle_")[0]
+        shown = self.session.has("structure")
+        self.session.set(key, not shown)
+        if shown:
+            self.typed.pop("structure", None)
+        await self.run_in(key, "toggle_structure")
+        if not shown:
+            self.typed["structure"] = words(self.rng, 4)
+            self.session.set("structure", self.typed["structure"])
+            await self.run_in("structure", "fill_field")
+
+    async def switch_language(self):
+        self.lang = 1 - self.lang
+        await self.run_page("switch_language", self.session.choose_language(self.lang))
+        # The page menu changes with the language and starts over on Intro
+        await self.run_page("open_builder", self.session.choose_page(1))
+        # The structure toggle belongs to the language's output section, so it starts out off
+        self.typed.pop("structure", None)
+
+    async def download(self):
+        if self.session.preview.stale:
+            self.recorder.rerun("resync", await self.session.resync_preview(), "fragment")
+        prompt = self.session.preview.text()
+        ok = all(value in prompt for value in self.typed.values())
+        self.recorder.downloads.append(ok)
+        if not ok:
+            self.recorder.errors["download_mismatch"] += 1
+
+    async def work(self, stop_at, think):
+        steps, weights = list(STEP_WEIGHTS), list(STEP_WEIGHTS.values())
+        while True:
+            await asyncio.sleep(self.rng.expovariate(1 / think) if think else 0)
+            if time.monotonic() >= stop_at:
+                return
+            await getattr(self, self.rng.choices(steps, weights)[0])()
+
+
+async def simulate_user(url, seed, start_delay, stop_at, think, recorder):
+    await asyncio.sleep(start_delay)
+    try:
+        session = await AppSession.open(url)
+    except Exception as e:
+        recorder.errors[f"connect:{type(e).__name__}"] += 1
+        return
+    user = User(session, random.Random(seed), recorder)
+    try:
+        await user.open()
+        await user.work(stop_at, think)
+    except Exception as e:
+        recorder.errors[type(e).__name__] += 1
+    finally:
+        session.close()
+
+
+async def sample_server(server, stop_at, samples, interval=0.5):
+    while time.monotonic() < stop_at:
+        samples.append(server.rss_bytes())
+        await asyncio.sleep(interval)
+
+
+async def drive(url, server, sessions, duration, ramp, think, seed):
+    """
+    Run `sessions` users for `duration` seconds after a `ramp` during which they join.
+    Returns:
+        dict: The level's results.
+    """
+    recorder = Recorder()
+    start = time.monotonic()
+    measure_from, stop_at = start + ramp, start + ramp + duration
+    rss = []
+    tasks = [
+        simulate_user(url, seed * 100_003 + i, ramp * i / max(1, sessions), stop_at, think, recorder)
+        for i in range(sessions)
+    ]
+    if server:
+        tasks.append(sample_server(server, stop_at, rss))
+    await asyncio.sleep(0)
+    # CPU is counted from the end of the ramp, when every user is in
+    measured = asyncio.ensure_future(asyncio.gather(*tasks))
+    await asyncio.sleep(max(0.0, measure_from - time.monotonic()))
+    server_cpu = server.cpu_seconds() if server else None
+    client_cpu = time.process_time()
+    await asyncio.sleep(max(0.0, stop_at - time.monotonic()))
+    window = time.monotonic() - measure_from
+    if server:
+        server_cpu = server.cpu_seconds() - server_cpu
+    client_cpu = time.process_time() - client_cpu
+    await measured
+    return summarize(recorder, sessions, measure_from, stop_at, window, server_cpu, client_cpu, rss)
+
+
+def latency(samples):
+    if not samples:
+        return {}
+    return {
+        "p50_ms": percentile(samples, 0.50) * 1000,
+        "p90_ms": percentile(samples, 0.90) * 1000,
+        "p99_ms": percentile(samples, 0.99) * 1000,
+        "samples": len(samples),
+    }
+
+
+def summarize(recorder, sessions, measure_from, stop_at, window, server_cpu, client_cpu, rss):
+    reruns = [r for r in recorder.reruns if measure_from <= r[0] <= stop_at]
+    received = sum(r[4] for r in reruns)
+    result = {
+        "sessions": sessions,
+        "reruns_per_sec": len(reruns) / window,
+        "latency": latency([r[3] for r in reruns]),
+        "fragment_latency": latency([r[3] for r in reruns if r[2] == "fragment"]),
+        "page_latency": latency([r[3] for r in reruns if r[2] == "page"]),
+        "steps": {step: latency([r[3] for r in reruns if r[1] == step]) for step in sorted({r[1] for r in reruns})},
+        "ws_bytes_per_sec": received / window,
+        "ws_bytes_per_rerun": received / len(reruns) if reruns else 0,
+        "client_cpu_percent": client_cpu / window * 100,
+        "downloads": len(recorder.downloads),
+        "errors": dict(recorder.errors),
+    }
+    if server_cpu is not None:
+        result["server_cpu_percent"] = server_cpu / window * 100
+        result["server_cpu_ms_per_rerun"] = server_cpu / len(reruns) * 1000 if reruns else 0
+        result["rss_peak_mb"] = max(rss) / 2**20 if rss else 0
+        result["rss_end_mb"] = rss[-1] / 2**20 if rss else 0
+    return result
+
+
+def run_level(args, sessions):
+    if args.url:
+        return asyncio.run(drive(args.url, None, sessions, args.duration, args.ramp, args.think, args.seed))
+    with AppServer() as server:
+        result = asyncio.run(drive(server.url, server, sessions, args.duration, args.ramp, args.think, args.seed))
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 25, 50], help="Concurrency levels")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per level")
+    parser.add_argument("--ramp", type=float, default=5, help="Seconds over which users join, not measured")
+    parser.add_argument("--think", type=float, default=1.0, help="Mean pause between a user's steps, in seconds; 0 for none")
+    parser.add_argument("--slo-ms", type=float, default=250, help="p99 rerun latency a level must stay under")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="Load this server instead of starting one per level (no server CPU/RSS)")
+    parser.add_argument("-o", "--output", help="Also write the report as JSON")
+    args = parser.parse_args()
+
+    levels = []
+    print(f"{'sessions':>8} {'reruns/s':>9} {'p50':>8} {'p90':>8} {'p99':>8} {'frag p99':>9} {'page p99':>9} "
+          f"{'KB/rerun':>9} {'srv CPU':>8} {'RSS MB':>7} {'errors':>6}")
+    for sessions in args.sessions:
+        result = run_level(args, sessions)
+        levels.append(result)
+        lat = result["latency"]
+        print(f"{sessions:>8} {result['reruns_per_sec']:>9.1f} {lat.get('p50_ms', 0):>6.1f}ms {lat.get('p90_ms', 0):>6.1f}ms "
+              f"{lat.get('p99_ms', 0):>6.1f}ms {result['fragment_latency'].get('p99_ms', 0):>7.1f}ms "
+              f"{result['page_latency'].get('p99_ms', 0):>7.1f}ms {result['ws_bytes_per_rerun'] / 1024:>9.1f} "
+              f"{result.get('server_cpu_percent', 0):>7.0f}% {result.get('rss_peak_mb', 0):>7.0f} "
+              f"{sum(result['errors'].values()):>6}", flush=True)
+    within = [r["sessions"] for r in levels if r["latency"] and r["latency"]["p99_ms"] <= args.slo_ms and not r["errors"]]
+    capacity = max(within, default=0)
+    print(f"Capacity: {capacity} concurrent sessions with p99 rerun latency under {args.slo_ms:.0f} ms"
+          f" and no errors (think time {args.think}s)")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "meta": {**metadata(), "cpus": os.cpu_count(), "args": vars(args)},
+                "capacity_sessions": capacity,
+                "levels": levels,
+            }, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
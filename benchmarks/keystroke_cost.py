@@ -0,0 +1,114 @@
+"""
+Server cost of one keystroke in the builder, with fragment-scoped reruns
+against whole-page reruns, as the form grows.
+
+    python benchmarks/keystroke_cost.py --actions 1 10 100 1000 -o keystrokes.json
+
+Starts `streamlit run app.py` and drives one session through its websocket
+(see app_client.py). For every action count, it fills every field and imports
+the actions. Then it types into the Domain field and into the first action,
+one character per rerun, first rerunning only the fragment the browser would
+rerun and then the whole page, as a page without fragments would. It reports
+rerun latency percentiles, server CPU per keystroke and bytes sent back.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app_client import AppServer, AppSession  # noqa: E402
+from run_benchmarks import FIELDS, metadata, percentile  # noqa: E402
+
+TYPED = "quantitative finance for retail investors "
+
+
+async def prepare(server, actions, field_chars):
+    """A session on the builder page with every field filled and `actions` actions."""
+    session = await AppSession.open(server.url)
+    await session.rerun()
+    await session.choose_page(1)
+    for key in FIELDS:
+        if session.has(key):
+            session.set(key, ("lorem ipsum " * (field_chars // 12 + 1))[:field_chars])
+    await session.rerun()
+    session.set("show_bulk_actions", True)
+    await session.rerun(session.fragment_of("show_bulk_actions"))
+    session.set("bulk_actions", "\n".join(f"Search: step {i}" for i in range(actions)))
+    session.click("import_actions")
+    await session.rerun(session.fragment_of("import_actions"))
+    if session.has("action_page"):
+        # Import jumps to the last page; type into the first one
+        session.set("action_page", 1)
+        await session.rerun(session.fragment_of("import_actions"))
+    return session
+
+
+async def type_into(server, session, key, keystrokes, scoped):
+    """
+    Type `keystrokes` characters into widget `key`, one rerun each.
+    Returns:
+        dict: Latency percentiles, CPU and bytes per keystroke.
+    """
+    widget = session.find(key)
+    base = "x" if widget.kind == "text_area" else ""
+    samples = []
+    sent = 0
+    cpu = server.cpu_seconds()
+    for i in range(keystrokes):
+        session.set(key, base + (TYPED * (keystrokes // len(TYPED) + 1))[:i + 1])
+        result = await session.rerun(session.fragment_of(key) if scoped else "")
+        samples.append(result.seconds)
+        sent += result.bytes
+    cpu = server.cpu_seconds() - cpu
+    return {
+        "p50_us": percentile(samples, 0.50) * 1e6,
+        "p99_us": percentile(samples, 0.99) * 1e6,
+        "cpu_us_per_keystroke": cpu / keystrokes * 1e6,
+        "bytes_per_keystroke": sent / keystrokes,
+        "samples": keystrokes,
+    }
+
+
+async def run(server, action_counts, keystrokes, field_chars):
+    results = {}
+    for actions in action_counts:
+        session = await prepare(server, actions, field_chars)
+        first_action = next(w.key for w in session.widgets.values() if (w.key or "").startswith("action_value_"))
+        for target, key in (("field", "domain"), ("action", first_action)):
+            for scope, scoped in (("fragment", True), ("page", False)):
+                # One untimed keystroke, so both scopes start from the same state
+                await type_into(server, session, key, 1, scoped)
+                results[f"keystroke/{target}/{scope}/actions={actions}"] = await type_into(
+                    server, session, key, keystrokes, scoped
+                )
+        session.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--actions", type=int, nargs="+", default=[1, 10, 100, 1000], help="Action counts to measure")
+    parser.add_argument("--keystrokes", type=int, default=60, help="Timed keystrokes per measurement")
+    parser.add_argument("--field-chars", type=int, default=2000, help="Characters put in every text field")
+    parser.add_argument("--no-post-script-gc", action="store_true",
+                        help="Turn off Streamlit's gc.collect() after every script run")
+    parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    options = ["--runner.postScriptGC", "false"] if args.no_post_script_gc else []
+    with AppServer(options=options) as server:
+        results = asyncio.run(run(server, args.actions, args.keystrokes, args.field_chars))
+    print(f"{'keystroke':<40} {'p50':>9} {'p99':>9} {'CPU':>9} {'sent':>9}")
+    for name, result in results.items():
+        print(f"{name:<40} {result['p50_us'] / 1000:7.2f}ms {result['p99_us'] / 1000:7.2f}ms "
+              f"{result['cpu_us_per_keystroke'] / 1000:7.2f}ms {result['bytes_per_keystroke']:8,.0f}B")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
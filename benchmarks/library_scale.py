@@ -0,0 +1,72 @@
+"""
+Measure prompt library search and load latency as the library grows.
+
+    python benchmarks/library_scale.py --entries 1000000 -o library.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt_library import PromptLibrary  # noqa: E402
+from run_benchmarks import metadata, time_calls  # noqa: E402
+
+WORDS = ("market", "research", "analysis", "python", "finance", "biology", "design", "strategy", "金融", "市場", "分析", "設計")
+QUERIES = ("finance", "market analysis", "金融", "市場分析", "rare-word-7", "no-such-word", "strat*")
+
+
+def make_entry(rng, i):
+    words = [rng.choice(WORDS) for _ in range(6)]
+    form = {
+        "domain": words[0],
+        "specialization": f"{words[1]} {words[2]}",
+        "specificGoal": f"{words[3]} goal {i}" + (" rare-word-7" if i % 100_000 == 7 else ""),
+        "action": [{"type": "Search", "value": f"{words[4]} {i % 1000}"}, {"type": "Lookup", "value": words[5]}],
+        "details": "audience: engineers; budget: small",
+        "format": "markdown",
+    }
+    return f"entry {i}", form
+
+
+def fill(library, count, batch=50_000, seed=0):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for first in range(0, count, batch):
+        library.save_many([make_entry(rng, i) for i in range(first, min(count, first + batch))])
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    parser.add_argument("--budget", type=float, default=0.5, help="Seconds spent on each query")
+    parser.add_argument("--db", help="Library file to fill (default: a temporary file)")
+    parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        library = PromptLibrary(args.db or os.path.join(tmp, "library.db"))
+        seconds = fill(library, args.entries)
+        print(f"Saved {args.entries:,} entries in {seconds:.1f}s ({args.entries / seconds:,.0f}/s)")
+        results = {}
+        for query in QUERIES:
+            hits = len(library.search(query))
+            results[f"library_search/{query}"] = result = time_calls(lambda: library.search(query), args.budget)
+            print(f"search {query!r:<16} {hits:>3} hits  p50 {result['p50_us'] / 1000:.2f} ms  p99 {result['p99_us'] / 1000:.2f} ms")
+        rng = random.Random(1)
+        results["library_get"] = result = time_calls(lambda: library.get(rng.randint(1, args.entries)), args.budget)
+        print(f"get by id                         p50 {result['p50_us'] / 1000:.2f} ms  p99 {result['p99_us'] / 1000:.2f} ms")
+        library.close()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+"""
+Measure prompt_lint against the speed its input can be read from disk.
+
+    python benchmarks/lint_scale.py --records 1000000 --bad 0.01 --workers 1 4 0 -o lint.json
+
+Renders a JSONL corpus and a prompt store of --records prompts, a --bad
+fraction of them from records with an empty field, a missing action list or
+a repeated action. Each file is first read end to end, then linted on each
+--workers count (`-` checks in this process, 0 means one per CPU). The
+found count is checked against the records that were made bad.
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import prompt_lint  # noqa: E402
+from prompt_cli import JsonlWriter, StoreWriter, iter_chunks, run_parallel  # noqa: E402
+from run_benchmarks import metadata  # noqa: E402
+
+
+def make_record(i, rng, bad):
+    record = {
+        "id": f"rec-{i}",
+        "domain": rng.choice(["finance", "biology", "law", "retail"]),
+        "specialization": f"topic {i % 101}",
+        "specificGoal": f"summarize report {i}",
+        "details": "quarterly figures " * rng.randrange(1, 20),
+        "constraints": "cite every source",
+        "format": rng.choice(["JSON", "markdown"]),
+        "structure": i % 3 == 0,
+        "unwantedResult": "speculate",
+        "action": [{"type": "Search", "value": f"step {n}"} for n in range(rng.randrange(1, 6))],
+    }
+    if bad:
+        flaw = rng.randrange(3)
+        if flaw == 0:
+            record[rng.choice(["specificGoal", "details", "domain"])] = ""
+        elif flaw == 1:
+            record["action"] = []
+        else:
+            record["action"].append(dict(record["action"][0]))
+    return record
+
+
+def read_through(path):
+    """Seconds to read a file end to end in 16 MiB blocks."""
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        while f.read(16 << 20):
+            pass
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--bad", type=float, default=0.01, help="Fraction of records rendered with an issue")
+    parser.add_argument("--workers", nargs="+", default=["-", "0"], help="Worker counts to lint on; '-' is in-process")
+    parser.add_argument("--dir", help="Where to write the corpora (default: a temporary directory)")
+    parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    flags = [rng.random() < args.bad for _ in range(args.records)]
+    results = {}
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        jsonl = os.path.join(tmp, "corpus.jsonl")
+        store = os.path.join(tmp, "corpus.prompts")
+        for writer in (JsonlWriter(open(jsonl, "w", encoding="utf-8")), StoreWriter(store)):
+            records = (make_record(i, random.Random(i), bad) for i, bad in enumerate(flags))
+            run_parallel(iter_chunks(records, 1000), writer)
+            writer.close()
+            if isinstance(writer, JsonlWriter):
+                writer.stream.close()
+
+        for kind, path in (("jsonl", jsonl), ("store", store)):
+            size = os.path.getsize(path)
+            seconds = read_through(path)
+            results[f"{kind}_read"] = {"mb_per_sec": size / seconds / 1e6, "bytes": size}
+            print(f"{kind:5}  read            {size / seconds / 1e6:8,.0f} MB/s  ({size / 1e9:.2f} GB)")
+            for workers in args.workers:
+                summary = prompt_lint.run(path, kind, io.StringIO(), workers=None if workers == "-" else int(workers))
+                report = summary.to_dict()
+                if report["records_with_issues"] != sum(flags):
+                    print(f"  expected {sum(flags):,} records with issues, found {report['records_with_issues']:,}")
+                results[f"{kind}_lint_workers_{workers}"] = {
+                    key: report[key] for key in ("mb_per_sec", "seconds", "records_with_issues")
+                }
+                print(f"{kind:5}  lint workers {workers:>2} {report['mb_per_sec']:8,.0f} MB/s  "
+                      f"{report['records'] / report['seconds']:12,.0f} records/s")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
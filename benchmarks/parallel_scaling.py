@@ -0,0 +1,76 @@
+"""
+Measure how `python -m prompt_cli --workers N` scales with the number of processes.
+
+    python benchmarks/parallel_scaling.py --records 2000000 --max-workers 16
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from prompt_cli import JsonlWriter, iter_chunks, read_records, run_parallel, run_serial  # noqa: E402
+
+
+def make_input(path, count):
+    """Write `count` synthetic form records as JSONL."""
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            record = {
+                "id": i,
+                "domain": f"domain {i % 97}",
+                "specialization": f"specialization {i % 13}",
+                "specificGoal": f"reach goal number {i}",
+                "action": [{"type": "Search", "value": f"query {i}"}, {"type": "Lookup", "value": f"topic {i % 7}"}],
+                "details": "audience: engineers; budget: small",
+                "constraints": "",
+                "format": "markdown",
+                "structure": "",
+                "unwantedResult": "vague advice",
+            }
+            f.write(json.dumps(record) + "\n")
+
+
+def time_run(path, workers, chunk_size):
+    """Render the input once and return the elapsed seconds."""
+    with open(path, encoding="utf-8") as source, open(os.devnull, "w", encoding="utf-8") as sink:
+        chunks = iter_chunks(read_records(source, raw=workers > 0), chunk_size)
+        start = time.perf_counter()
+        if workers:
+            run_parallel(chunks, JsonlWriter(sink), workers=workers)
+        else:
+            run_serial(chunks, JsonlWriter(sink))
+        return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=500_000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "records.jsonl")
+        make_input(path, args.records)
+        counts = [0]
+        n = 1
+        while n < args.max_workers:
+            counts.append(n)
+            n *= 2
+        counts.append(args.max_workers)
+
+        serial = None
+        print(f"{'workers':>8} {'seconds':>9} {'records/s':>12} {'speedup':>8}")
+        for workers in counts:
+            elapsed = time_run(path, workers, args.chunk_size)
+            serial = serial or elapsed
+            label = "serial" if workers == 0 else str(workers)
+            print(f"{label:>8} {elapsed:9.2f} {args.records / elapsed:12,.0f} {serial / elapsed:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Measure incremental rebuilds of a prompt store against rendering it again.
+
+    python benchmarks/rebuild_scale.py --records 1000000 --edit 0.001 --workers 0 -o rebuild.json
+
+Times four runs of `prompt_rebuild.rebuild` over the same records:
+- the first build
+- a rerun with nothing changed
+- a rerun after a one-line edit to the output-format template
+- a rerun after --edit of the records changed
+
+The template edit is simulated by changing the output section's version in
+the manifest. The rebuild then does the same work as after a real edit,
+while the templates on disk stay as they are.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from prompt_rebuild import MANIFEST_SUFFIX, Manifest, rebuild  # noqa: E402
+from run_benchmarks import metadata  # noqa: E402
+
+
+def make_line(i, rng, revision=0):
+    return json.dumps({
+        "id": f"rec-{i}",
+        "domain": rng.choice(["finance", "biology", "law", "retail"]),
+        "specialization": f"topic {i % 101}",
+        "specificGoal": f"summarize report {i} (revision {revision})",
+        "details": "quarterly figures " * rng.randrange(1, 40),
+        "constraints": "cite every source",
+        "format": rng.choice(["JSON", "markdown"]),
+        "structure": "title, summary, table" if i % 3 == 0 else "",
+        "unwantedResult": "speculate",
+        "action": [{"type": "Search", "value": f"step {n} of {i}"} for n in range(rng.randrange(1, 6))],
+    })
+
+
+def write_records(path, count, edited=()):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(make_line(i, random.Random(i), int(i in edited)) + "\n")
+
+
+def timed(records_path, store, workers=None):
+    start = time.perf_counter()
+    with open(records_path, encoding="utf-8") as f:
+        result = rebuild(f, store, workers=workers)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--edit", type=float, default=0.001, help="Fraction of records changed for the last run")
+    parser.add_argument("--workers", type=int, help="Render on this many processes; 0 means one per CPU")
+    parser.add_argument("--dir", help="Where to write the files (default: a temporary directory)")
+    parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        records = os.path.join(tmp, "records.jsonl")
+        store = os.path.join(tmp, "corpus.prompts")
+        write_records(records, args.records)
+
+        def report(name, seconds, result):
+            results[name] = {"seconds": seconds, "records_per_sec": args.records / seconds, **result}
+            print(f"{name:16} {seconds:8.2f}s  {args.records / seconds:12,.0f} records/s  "
+                  f"added {result['added']:,}  changed {result['changed']:,}  patched {result['patched']:,}")
+
+        report("full_build", *timed(records, store, args.workers))
+        report("no_change", *timed(records, store, args.workers))
+
+        manifest = Manifest.load(store + MANIFEST_SUFFIX)
+        manifest.sections["output"] = "edited"
+        manifest.save(store + MANIFEST_SUFFIX)
+        report("template_edit", *timed(records, store, args.workers))
+
+        edited = set(random.Random(0).sample(range(args.records), int(args.records * args.edit)))
+        write_records(records, args.records, edited)
+        report("records_edit", *timed(records, store, args.workers))
+        results["data_bytes"] = os.path.getsize(store)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Compare the memory held by form records as dicts and as `models.FormRecord`,
+and the batch render speed of each.
+
+    python benchmarks/record_memory.py --records 200000 -o memory.json
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models import FormRecord  # noqa: E402
+from prompt_cli import parse_record  # noqa: E402
+from run_benchmarks import metadata  # noqa: E402
+from utils import generate_prompts  # noqa: E402
+
+
+def make_lines(count):
+    """JSONL records shaped like a bulk export: a few repeated categories, unique goals and queries."""
+    lines = []
+    for i in range(count):
+        record = {
+            "id": i,
+            "domain": f"domain {i % 97}",
+            "specialization": f"specialization {i % 13}",
+            "specificGoal": f"reach goal number {i}",
+            "action": [{"type": "Search", "value": f"query {i}"}, {"type": "Lookup", "value": f"topic {i % 7}"}],
+            "details": "audience: engineers; budget: small",
+            "constraints": "",
+            "format": "markdown",
+            "structure": "",
+            "unwantedResult": "vague advice",
+        }
+        lines.append(json.dumps(record))
+    return lines
+
+
+def measure(load, lines):
+    """
+    Load every line with `load` and keep the results.
+    Returns:
+        tuple: (records, bytes allocated and still held, seconds)
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    records = [load(line) for line in lines]
+    seconds = time.perf_counter() - start
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return records, held, seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=200_000)
+    parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    lines = make_lines(args.records)
+    results = {}
+    for name, load in (("dict", parse_record), ("FormRecord", FormRecord.from_json)):
+        records, held, load_seconds = measure(load, lines)
+        start = time.perf_counter()
+        generate_prompts(records)
+        render_seconds = time.perf_counter() - start
+        results[f"records/{name}"] = {
+            "bytes_per_record": held / args.records,
+            "load_records_per_sec": args.records / load_seconds,
+            "render_records_per_sec": args.records / render_seconds,
+        }
+        del records
+    for name, result in results.items():
+        print(f"{name:<20} {result['bytes_per_record']:7.0f} B/record  "
+              f"load {result['load_records_per_sec']:9,.0f}/s  render {result['render_records_per_sec']:9,.0f}/s")
+    ratio = results["records/dict"]["bytes_per_record"] / results["records/FormRecord"]["bytes_per_record"]
+    print(f"FormRecord uses {ratio:.1f}x less memory per record")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,238 @@
+"""
+Latency and throughput benchmarks for prompt generation and app reruns.
+
+    python benchmarks/run_benchmarks.py -o before.json
+    python benchmarks/run_benchmarks.py -o after.json --compare before.json --threshold 0.15
+
+Results are written as JSON so runs from different commits can be compared.
+With --compare, the exit status is 1 when any benchmark got slower than the
+threshold allows.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import generate_prompt, generate_prompts  # noqa: E402
+
+LANGS = ("en", "zh")
+ACTION_COUNTS = (0, 1, 10, 100, 1000)
+FIELD_SIZES = {"empty": 0, "1KB": 1 << 10, "100KB": 100 << 10, "1MB": 1 << 20}
+FIELDS = ("domain", "specialization", "specificGoal", "details", "constraints", "format", "structure", "unwantedResult")
+ACTION_TYPES = ("Search", "Lookup", "Browse")
+
+
+def make_form(field_size, action_count, action_form="list"):
+    """Build a form record with every field `field_size` characters long and `action_count` actions."""
+    form = {key: ("x" * field_size) for key in FIELDS}
+    if action_form == "list":
+        form["action"] = [{"type": ACTION_TYPES[i % 3], "value": f"step {i}"} for i in range(action_count)]
+    else:
+        form["action"] = "\n".join(f"step {i}" for i in range(action_count))
+    return form
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def time_calls(fn, budget, min_samples=5):
+    """
+    Call `fn` repeatedly for about `budget` seconds.
+    Returns:
+        dict: p50_us, p99_us and ops_per_sec over the samples.
+    """
+    samples = []
+    deadline = time.perf_counter() + budget
+    while len(samples) < min_samples or time.perf_counter() < deadline:
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {
+        "p50_us": percentile(samples, 0.50) * 1e6,
+        "p99_us": percentile(samples, 0.99) * 1e6,
+        "ops_per_sec": len(samples) / sum(samples),
+        "samples": len(samples),
+    }
+
+
+def bench_latency(budget):
+    results = {}
+    for lang in LANGS:
+        for action_form in ("list", "str"):
+            for count in ACTION_COUNTS:
+                for size_name, size in FIELD_SIZES.items():
+                    form = make_form(size, count, action_form)
+                    name = f"generate_prompt/{lang}/actions={count}:{action_form}/fields={size_name}"
+                    results[name] = time_calls(lambda: generate_prompt(form, lang), budget)
+    return results
+
+
+def bench_batch(records, budget):
+    results = {}
+    for lang in LANGS:
+        batch = [dict(make_form(16, 3), domain=f"domain {i}") for i in range(records)]
+        name = f"generate_prompts/{lang}/records={records}"
+        result = time_calls(lambda: generate_prompts(batch, lang), budget, min_samples=3)
+        result["records_per_sec"] = result["ops_per_sec"] * records
+        results[name] = result
+    return results
+
+
+def app_test(page):
+    """
+    Load app.py under Streamlit's AppTest, showing main menu entry `page`.
+    The option_menu component does not render under AppTest, so it is replaced
+    by a stub that picks the requested page.
+    """
+    import streamlit_option_menu
+    from streamlit.testing.v1 import AppTest
+
+    def pick(menu_title=None, options=(), default_index=0, **kwargs):
+        return options[default_index if options[0] == "English" else page]
+
+    streamlit_option_menu.option_menu = pick
+    return AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+
+
+def probe_cold_start(page):
+    """Time the first run of app.py in this (fresh) process; used via --probe-cold-start."""
+    at = app_test(page)
+    start = time.perf_counter()
+    at.run()
+    elapsed = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    print(json.dumps(elapsed))
+
+
+def bench_cold_start(repeats):
+    """Time the first script run of app.py, each sample in a new interpreter."""
+    results = {}
+    for page in (0, 1):
+        samples = []
+        for _ in range(repeats):
+            out = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--probe-cold-start", str(page)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            samples.append(json.loads(out.strip().splitlines()[-1]))
+        results[f"app_cold_start/{'intro' if page == 0 else 'build'}"] = {
+            "p50_us": percentile(samples, 0.50) * 1e6,
+            "p99_us": percentile(samples, 0.99) * 1e6,
+            "ops_per_sec": len(samples) / sum(samples),
+            "samples": len(samples),
+        }
+    return results
+
+
+def bench_app(reruns):
+    """Time full headless reruns of app.py with Streamlit's AppTest."""
+    import streamlit_option_menu
+
+    results = {}
+    original = streamlit_option_menu.option_menu
+    for page in (0, 1):
+        try:
+            at = app_test(page)
+            at.run()
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+            samples = []
+            for _ in range(reruns):
+                start = time.perf_counter()
+                at.run()
+                samples.append(time.perf_counter() - start)
+        finally:
+            streamlit_option_menu.option_menu = original
+        results[f"app_rerun/{'intro' if page == 0 else 'build'}"] = {
+            "p50_us": percentile(samples, 0.50) * 1e6,
+            "p99_us": percentile(samples, 0.99) * 1e6,
+            "ops_per_sec": len(samples) / sum(samples),
+            "samples": len(samples),
+        }
+    return results
+
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the change of every benchmark present in both runs.
+    Returns:
+        list: Names of benchmarks whose median latency grew by more than `threshold`.
+    """
+    regressions = []
+    print(f"{'benchmark':<70} {'base p50':>11} {'p50':>11} {'change':>8}")
+    for name, result in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        change = result["p50_us"] / old["p50_us"] - 1
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<70} {old['p50_us']:9.1f}us {result['p50_us']:9.1f}us {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-o", "--output", default="benchmark_results.json", help="Where to write the results")
+    parser.add_argument("--budget", type=float, default=0.2, help="Seconds spent on each latency benchmark")
+    parser.add_argument("--batch-records", type=int, default=100_000)
+    parser.add_argument("--reruns", type=int, default=30, help="Timed app reruns per page")
+    parser.add_argument("--cold-starts", type=int, default=3, help="Fresh-process first runs per page")
+    parser.add_argument("--skip-app", action="store_true", help="Skip the AppTest rerun benchmarks")
+    parser.add_argument("--probe-cold-start", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--compare", metavar="BASELINE", help="Results file from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed p50 slowdown, as a fraction")
+    args = parser.parse_args()
+    if args.probe_cold_start is not None:
+        probe_cold_start(args.probe_cold_start)
+        return 0
+
+    results = {}
+    results.update(bench_latency(args.budget))
+    results.update(bench_batch(args.batch_records, args.budget))
+    if not args.skip_app:
+        results.update(bench_cold_start(args.cold_starts))
+        results.update(bench_app(args.reruns))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({"meta": metadata(), "results": results}, f, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than the {args.threshold:.0%} threshold")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Load-test `prompt_server` over keep-alive connections and report throughput and tail latency.
+
+    python benchmarks/server_load.py --spawn --connections 64 --duration 10
+    python benchmarks/server_load.py --url http://127.0.0.1:8000 --batch-size 500 -o server.json
+
+With --spawn a server is started on a free local port for the run. Without
+--batch-size each request is one POST /render; with it, each request is one
+POST /render/batch of that many records.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from run_benchmarks import make_form, metadata, percentile  # noqa: E402
+
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection that sends requests one after another."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, path, body):
+        """
+        POST `body` to `path` and read the whole response.
+        Returns:
+            tuple: (status code, response body bytes)
+        """
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n".encode("ascii") + body
+        )
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding") == "chunked":
+            parts = []
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0], 16)
+                parts.append(await self.reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            payload = b"".join(p[:-2] for p in parts)
+        else:
+            payload = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, payload
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = self.reader = None
+
+
+async def worker(conn, path, bodies, deadline, latencies, errors):
+    i = 0
+    while time.perf_counter() < deadline:
+        body = bodies[i % len(bodies)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            status, _ = await conn.request(path, body)
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            conn.close()
+            errors.append("connection")
+            continue
+        if status == 200:
+            latencies.append(time.perf_counter() - start)
+        else:
+            errors.append(status)
+    conn.close()
+
+
+async def run_load(host, port, connections, duration, batch_size, lang):
+    """
+    Keep `connections` requests in flight for `duration` seconds.
+    Returns:
+        dict: Request and prompt throughput, latency percentiles and error count.
+    """
+    if batch_size:
+        path = f"/render/batch?lang={lang}"
+        bodies = [json.dumps([make_form(16, 3) | {"id": f"{n}-{i}"} for i in range(batch_size)]).encode() for n in range(4)]
+    else:
+        path = f"/render?lang={lang}"
+        bodies = [json.dumps(make_form(16, 3) | {"domain": f"domain {i}"}).encode() for i in range(64)]
+    latencies, errors = [], []
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        worker(Connection(host, port), path, bodies, deadline, latencies, errors) for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    if not latencies:
+        raise RuntimeError(f"no successful requests ({len(errors)} errors)")
+    return {
+        "requests_per_sec": len(latencies) / elapsed,
+        "prompts_per_sec": len(latencies) * (batch_size or 1) / elapsed,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p90_us": percentile(latencies, 0.90) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "p999_us": percentile(latencies, 0.999) * 1e6,
+        "max_us": max(latencies) * 1e6,
+        "requests": len(latencies),
+        "errors": len(errors),
+    }
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(port, extra_args):
+    """Start `python -m prompt_server` on `port` and wait until it answers."""
+    server = subprocess.Popen(
+        [sys.executable, "-m", "prompt_server", "--port", str(port), *extra_args],
+        cwd=ROOT, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return server
+        except OSError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("prompt_server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server to load (ignored with --spawn)")
+    parser.add_argument("--spawn", action="store_true", help="Start a local prompt_server for the run")
+    parser.add_argument("--server-args", default="", help="Extra arguments for the spawned server, e.g. '--batch-delay 1'")
+    parser.add_argument("--connections", type=int, default=32, help="Concurrent keep-alive connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to keep the load on")
+    parser.add_argument("--batch-size", type=int, default=0, help="Records per /render/batch request (default: use /render)")
+    parser.add_argument("--lang", choices=("en", "zh"), default="en")
+    parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        host, port = "127.0.0.1", free_port()
+        server = spawn_server(port, args.server_args.split())
+    else:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    try:
+        result = asyncio.run(run_load(host, port, args.connections, args.duration, args.batch_size, args.lang))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    name = f"server/{'batch=' + str(args.batch_size) if args.batch_size else 'render'}/connections={args.connections}"
+    print(name)
+    print(f"  {result['requests_per_sec']:,.0f} req/s, {result['prompts_per_sec']:,.0f} prompts/s, {result['errors']} errors")
+    print("  latency " + ", ".join(f"{q} {result[q + '_us'] / 1000:.2f} ms" for q in ("p50", "p90", "p99", "p999", "max")))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(), "results": {name: result}}, f, indent=2)
+    return 1 if result["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Measure writing, opening and reading a prompt store as it grows, against
+finding one prompt in the equivalent JSONL file.
+
+    python benchmarks/store_scale.py --records 1000000 --prompt-bytes 1500 -o store.json
+
+Prompts are synthetic text of about --prompt-bytes bytes, so the numbers
+measure storage, not rendering. Opening is timed in a fresh process with
+cold Python caches; the OS page cache is left alone.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from prompt_store import INDEX_SUFFIX, PromptStore, PromptStoreWriter  # noqa: E402
+from run_benchmarks import metadata, time_calls  # noqa: E402
+
+OPEN_PROBE = """
+import sys, time
+sys.path.insert(0, {root!r})
+from prompt_store import PromptStore
+start = time.perf_counter()
+store = PromptStore({path!r})
+prompt = store.get({record_id!r})
+print(time.perf_counter() - start)
+"""
+
+
+def make_prompt(i, size):
+    head = f"# <Role>\n- You are an expert in domain {i % 97}.\n# <Task>\n- Reach goal number {i}.\n"
+    return head + "lorem ipsum dolor " * max(0, (size - len(head)) // 18)
+
+
+def write_store(path, count, size):
+    start = time.perf_counter()
+    with PromptStoreWriter(path) as writer:
+        for i in range(count):
+            writer.add(f"rec-{i}", make_prompt(i, size))
+    return time.perf_counter() - start
+
+
+def write_jsonl(path, count, size):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(count):
+            f.write(json.dumps({"id": f"rec-{i}", "prompt": make_prompt(i, size)}) + "\n")
+
+
+def scan_jsonl(path, record_id):
+    """Find one prompt the way a JSONL corpus allows: read lines until its ID turns up."""
+    needle = f'{{"id": "{record_id}",'
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith(needle):
+                return json.loads(line)["prompt"]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=1_000_000)
+    parser.add_argument("--prompt-bytes", type=int, default=1500)
+    parser.add_argument("--budget", type=float, default=0.5, help="Seconds spent on each read benchmark")
+    parser.add_argument("--dir", help="Where to write the files (default: a temporary directory)")
+    parser.add_argument("-o", "--output", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.dir) as tmp:
+        path = os.path.join(tmp, "corpus.prompts")
+        seconds = write_store(path, args.records, args.prompt_bytes)
+        data_bytes = os.path.getsize(path)
+        results = {"store_write": {
+            "records_per_sec": args.records / seconds,
+            "mb_per_sec": data_bytes / seconds / 1e6,
+            "data_bytes": data_bytes,
+            "index_bytes": os.path.getsize(path + INDEX_SUFFIX),
+        }}
+        print(f"Wrote {args.records:,} prompts ({data_bytes / 1e9:.2f} GB) in {seconds:.1f}s: "
+              f"{args.records / seconds:,.0f} records/s, {data_bytes / seconds / 1e6:,.0f} MB/s; "
+              f"index {results['store_write']['index_bytes'] / args.records:.0f} B/record")
+
+        samples = []
+        for _ in range(5):
+            out = subprocess.run(
+                [sys.executable, "-c", OPEN_PROBE.format(root=ROOT, path=path, record_id=f"rec-{args.records // 2}")],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            samples.append(float(out))
+        results["store_open_and_first_get"] = {"p50_us": sorted(samples)[2] * 1e6}
+        print(f"open + first lookup in a fresh process  p50 {sorted(samples)[2] * 1000:.2f} ms")
+
+        rng = random.Random(0)
+        with PromptStore(path) as store:
+            results["store_get"] = r = time_calls(lambda: store.get(f"rec-{rng.randrange(args.records)}"), args.budget)
+            print(f"get by id (decoded str)                 p50 {r['p50_us']:.1f} us  p99 {r['p99_us']:.1f} us")
+            results["store_view"] = r = time_calls(lambda: store.view(f"rec-{rng.randrange(args.records)}"), args.budget)
+            print(f"view by id (zero-copy bytes)            p50 {r['p50_us']:.1f} us  p99 {r['p99_us']:.1f} us")
+            results["store_slice_1000"] = r = time_calls(
+                lambda: store[(i := rng.randrange(max(1, args.records - 1000))):i + 1000], args.budget
+            )
+            print(f"slice of 1000 by position               p50 {r['p50_us'] / 1000:.2f} ms  p99 {r['p99_us'] / 1000:.2f} ms")
+
+        jsonl = os.path.join(tmp, "corpus.jsonl")
+        write_jsonl(jsonl, args.records, args.prompt_bytes)
+        results["jsonl_scan_get"] = r = time_calls(
+            lambda: scan_jsonl(jsonl, f"rec-{rng.randrange(args.records)}"), args.budget, min_samples=3
+        )
+        print(f"JSONL linear scan for one id            p50 {r['p50_us'] / 1000:.1f} ms")
+        print(f"Lookup by id is {r['p50_us'] / results['store_get']['p50_us']:,.0f}x faster than scanning JSONL")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"meta": metadata(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,289 @@
+"""Static UI tables (both languages) and the lookup indexes derived from them, built once per process."""
+
+# Action types and descriptions (multilingual)
+ACTION_TYPES_I18N = {
+    "en": [
+        {
+            "type": "Search",
+            "label": "Search",
+            "input_label": "Query",
+            "placeholder": "e.g. latest AI news, market trend, competitor updates",
+            "desc": "Find up-to-date info on the web."
+        },
+        {
+            "type": "Lookup",
+            "label": "Lookup",
+            "input_label": "Topic",
+            "placeholder": "e.g. LLM theory basics, Python list vs tuple, SWOT analysis",
+            "desc": "Quickly learn a concept or topic."
+        },
+        {
+            "type": "Browse",
+            "label": "Browse",
+            "input_label": "URL",
+            "placeholder": "e.g. https://arxiv.org/abs/2307..., https://news.ycombinator.com/...",
+            "desc": "Read a specific web page."
+        }
+    ],
+    "zh": [
+        {
+            "type": "Search",
+            "label": "搜尋",
+            "input_label": "查詢內容",
+            "placeholder": "例如：最新 AI 新聞、市場趨勢、競品資訊",
+            "desc": "在網路上找最新資訊。"
+        },
+        {
+            "type": "Lookup",
+            "label": "查找",
+            "input_label": "主題",
+            "placeholder": "例如：LLM 基本觀念、Python list 與 tuple 差異、SWOT 分析",
+            "desc": "快速了解一個概念或主題。"
+        },
+        {
+            "type": "Browse",
+            "label": "瀏覽",
+            "input_label": "網址",
+            "placeholder": "例如：https://arxiv.org/abs/2307...、https://news.ycombinator.com/...",
+            "desc": "閱讀指定的網頁內容。"
+        }
+    ]
+}
+
+# Define fields and sections
+FIELDS_I18N = {
+    "en": [
+        {"key": "domain", 
+        "title": "Domain", 
+        "placeholder": "e.g. digital marketing, machine learning, financial planning, software development...", 
+        "description": "The general field you are working in.", 
+        "section": "Role"},
+        {"key": "specialization", 
+        "title": "Specialization", 
+        "placeholder": "e.g. brand strategy and social media, deep learning and NLP, investment analysis, full-stack web development...", 
+        "description": "Your focus inside the domain.", 
+        "section": "Role"},
+        {"key": "specificGoal", 
+        "title": "Specific Goal", 
+        "placeholder": "e.g. create a comprehensive social media marketing strategy for a tech startup, analyze customer behavior patterns from sales data...", 
+        "description": "What you want to achieve in one sentence.", 
+        "section": "Task"},
+        {"key": "action", 
+        "title": "Action", 
+        "placeholder": "e.g. market research for social media trends, customer segmentation analysis, competitive analysis...", 
+        "description": "List the steps the assistant should take. Use \"Add Action\" for multiple steps.", 
+        "section": "Action"},
+        {"key": "details", 
+        "title": "Context Details", 
+        "placeholder": "e.g. Target audience: young professionals aged 25-35, Budget: $50k monthly, Industry: B2B SaaS...", 
+        "description": "Key facts the assistant should know (audience, budget, industry...).", 
+        "section": "Context"},
+        {"key": "constraints", 
+        "title": "Constraints", 
+        "placeholder": "e.g. Must comply with GDPR regulations, Limited to organic social media only, No budget for paid advertising...", 
+        "description": "Rules or limits to follow.", 
+        "section": "Context"},
+        {"key": "format", 
+        "title": "Output Format", 
+        "placeholder": "e.g. markdown, JSON, PDF report, Excel spreadsheet...", 
+        "description": "Choose the file or text format for the answer.", 
+        "section": "Output"},
+        {"key": "structure", 
+        "title": "Structure", 
+        "placeholder": "e.g. {title, executive_summary, analysis, recommendations, timeline}, {headers: [], data: [], charts: []}...", 
+        "description": "If you want a fixed structure, describe it here.", 
+        "section": "Output"},
+        {"key": "unwantedResult", 
+        "title": "Unwanted Result", 
+        "placeholder": "e.g. provide generic advice without specific data, include unverified claims, exceed 2000 words...", 
+        "description": "What to avoid in the answer.", 
+        "section": "Output"}
+    ],
+    "zh": [
+        {"key": "domain", 
+        "title": "領域", 
+        "placeholder": "例如：數位行銷、機器學習、財務規劃、軟體開發...", 
+        "description": "你正在處理的主要範疇。", 
+        "section": "角色"},
+        {"key": "specialization", 
+        "title": "專精項目", 
+        "placeholder": "例如：品牌策略與社群媒體、深度學習與 NLP、投資分析、全端網頁開發...", 
+        "description": "在該領域中的專注方向。", 
+        "section": "角色"},
+        {"key": "specificGoal", 
+        "title": "具體目標", 
+        "placeholder": "例如：為新創科技公司制定完整社群行銷策略、分析銷售數據中的顧客行為模式...", 
+        "description": "一句話說清楚你想達成什麼。", 
+        "section": "任務"},
+        {"key": "action", 
+        "title": "行動", 
+        "placeholder": "例如：社群趨勢市場調查、顧客分群分析、競品分析...", 
+        "description": "列出助理要做的步驟。要多步驟可用「新增行動」。", 
+        "section": "行動"},
+        {"key": "details", 
+        "title": "背景細節", 
+        "placeholder": "例如：目標族群：25-35 歲年輕專業人士、預算：每月五萬美金、產業：B2B SaaS...", 
+        "description": "助理需要知道的關鍵資訊（族群、預算、產業等）。", 
+        "section": "情境"},
+        {"key": "constraints", 
+        "title": "限制條件", 
+        "placeholder": "例如：必須符合一般資料保護規則的規範、僅限自然社群流量、無付費廣告預算...", 
+        "description": "需要遵守的規則或限制。", 
+        "section": "情境"},
+        {"key": "format", 
+        "title": "輸出格式", 
+        "placeholder": "例如：markdown、JSON、PDF 報告、Excel 試算表...", 
+        "description": "選擇輸出的檔案或文字格式。", 
+        "section": "輸出"},
+        {"key": "structure", 
+        "title": "結構", 
+        "placeholder": "例如：{title, executive_summary, analysis, recommendations, timeline}、{headers: [], data: [], charts: []}...", 
+        "description": "若需要固定結構，請在此描述。", 
+        "section": "輸出"},
+        {"key": "unwantedResult", 
+        "title": "避免結果", 
+        "placeholder": "例如：僅給出泛泛建議、包含未經查證的說法、超過 2000 字...", 
+        "description": "你不希望答案出現什麼。", 
+        "section": "輸出"}
+    ]
+}
+
+SECTIONS_I18N = {
+    "en": ["① Role", "② Task", "③ Context", "④ Action", "⑤ Output"],
+    "zh": ["① 角色", "② 任務", "③ 情境", "④ 行動", "⑤ 輸出"]
+}
+
+APP_I18N = {
+    "en": {
+        "title": "Structured Prompt Generator",
+        "subtitle": "Create clear, consistent prompts step by step.",
+        "fill_header": "Fill in Parameters",
+        "preview_header": "Preview",
+        "show_preview": "Show/Hide preview",
+        "download_btn": "Download File",
+        "reset_btn": "Reset",
+        "preview_labels": {"copy": "📋 Copy", "download": "⬇️ Download File", "copied": "Copied!", "copy_failed": "Copy failed"},
+        "library_labels": {
+            "header": "📚 Prompt Library", "name": "Name", "save": "💾 Save", "saved": "Saved to the library",
+            "search": "Search saved prompts", "search_help": "Every word must match; end a word with * to match its prefix",
+            "load": "Load", "loaded": "Loaded", "empty": "No saved prompts found",
+        },
+        "structure_explanation": """
+        ### 📋 Structure Explanation
+
+        - **Role:** Your domain and specialization
+        - **Task:** What you want to achieve
+        - **Context:** Important background and constraints
+        - **Action:** The steps to take (Search / Lookup / Browse)
+        - **Output:** Format, structure, and what to avoid
+        ---
+        ### 💡 Usage Tips
+        - All fields are optional
+        - For best results, fill Domain and Task first
+        - Empty fields will remain as `{placeholder}` in the preview
+        - Domain and Specialization are filled separately
+        """
+    },
+    "zh": {
+        "title": "結構化提示詞生成器",
+        "subtitle": "一步一步建立清楚、可迭代的提示詞",
+        "fill_header": "填入參數",
+        "preview_header": "生成預覽",
+        "show_preview": "顯示/隱藏預覽",
+        "download_btn": "下載檔案",
+        "reset_btn": "重置",
+        "preview_labels": {"copy": "📋 複製", "download": "⬇️ 下載檔案", "copied": "已複製！", "copy_failed": "複製失敗"},
+        "library_labels": {
+            "header": "📚 提示詞庫", "name": "名稱", "save": "💾 儲存", "saved": "已存入提示詞庫",
+            "search": "搜尋已儲存的提示詞", "search_help": "每個詞都要符合；詞尾加 * 可比對開頭",
+            "load": "載入", "loaded": "已載入", "empty": "找不到已儲存的提示詞",
+        },
+        "structure_explanation": """### 📋 架構說明
+
+        - **角色：** 你的領域與專精
+        - **任務：** 想要達成的目標
+        - **情境：** 重要背景與限制
+        - **行動：** 要採取的步驟（搜尋／查找／瀏覽）
+        - **輸出：** 格式、結構與需要避免的內容
+        ---
+        ### 💡 使用提示
+        - 所有欄位皆為選填
+        - 建議先填「領域」與「目標」
+        - 未填寫的欄位會以 `{placeholder}` 顯示在預覽
+        - 「領域」與「專精」分開填寫
+        """
+    }
+}
+
+# Dynamic main section names based on language
+MAIN_MENU = {
+    "en": ["Intro", "Build Prompt"],
+    "zh": ["概念說明", "開始建立提示詞"]
+}
+MAIN_ICONS = ["book", "pencil-fill"]
+
+# Visually enhanced structure explanation (1x5 columns with icons)
+STRUCTURE_ITEMS = {
+    "en": [
+        {"icon": "🧑‍💼", "title": "Role", "desc": "Your domain and specialization."},
+        {"icon": "🎯", "title": "Task", "desc": "What you want to achieve."},
+        {"icon": "📚", "title": "Context", "desc": "Background details and rules."},
+        {"icon": "🔍", "title": "Action", "desc": "Steps to search, learn, or browse."},
+        {"icon": "📤", "title": "Output", "desc": "Format, structure, and avoid list."},
+    ],
+    "zh": [
+        {"icon": "🧑‍💼", "title": "角色", "desc": "你的領域與專精。"},
+        {"icon": "🎯", "title": "任務", "desc": "想達成的目標。"},
+        {"icon": "📚", "title": "情境", "desc": "背景細節與規則。"},
+        {"icon": "🔍", "title": "行動", "desc": "要搜尋、查找或瀏覽的步驟。"},
+        {"icon": "📤", "title": "輸出", "desc": "格式、結構與避免清單。"},
+    ]
+}
+
+# Usage tips below the structure overview
+USAGE_TIPS = {
+    "en": """
+    ### 💡 Usage Reminders\n
+    - All fields are optional\n
+    - It is recommended to fill at least Domain and Task\n
+    - Unfilled fields will keep `{placeholder}` format\n
+    """,
+    "zh": """
+    ### 💡 使用提醒\n
+    - 所有欄位都是選填\n
+    - 建議至少填寫領域和目標\n
+    - 未填寫的欄位會保持 `{placeholder}` 格式\n
+    """
+}
+
+# Section whose inputs are the action list rather than text fields
+ACTION_SECTION = {"en": "Action", "zh": "行動"}
+
+
+def base_section(section):
+    """Normalize numbered labels like "① Role" -> "Role" or "① 角色" -> "角色"."""
+    if isinstance(section, str) and " " in section and section[0] in "①②③④⑤⑥⑦⑧⑨⑩":
+        return section.split(" ", 1)[1]
+    return section
+
+
+# Derived indexes, so reruns do dict lookups instead of scanning the tables
+SECTION_BASES = {
+    lang: [(section, base_section(section)) for section in sections]
+    for lang, sections in SECTIONS_I18N.items()
+}
+FIELDS_BY_SECTION = {
+    lang: {
+        base: [f for f in FIELDS_I18N[lang] if f["section"] == base and f["key"] != "action"]
+        for _, base in SECTION_BASES[lang]
+    }
+    for lang in FIELDS_I18N
+}
+STRUCTURE_SECTION = {
+    lang: next(f["section"] for f in fields if f["key"] == "structure") for lang, fields in FIELDS_I18N.items()
+}
+EMPTY_FORM = {lang: {field["key"]: "" for field in fields} for lang, fields in FIELDS_I18N.items()}
+ACTION_TYPE_KEYS = [t["type"] for t in ACTION_TYPES_I18N["en"]]
+ACTION_TYPES_BY_KEY = {lang: {t["type"]: t for t in types} for lang, types in ACTION_TYPES_I18N.items()}
+ACTION_TYPE_LABELS = {lang: {t["type"]: t["label"] for t in types} for lang, types in ACTION_TYPES_I18N.items()}
+ACTION_TYPE_INDEX = {t: i for i, t in enumerate(ACTION_TYPE_KEYS)}
@@ -0,0 +1,172 @@
+"""
+Opt-in timing and counters for app reruns and prompt rendering.
+
+Set PROMPT_METRICS=1 to turn it on. Set PROMPT_METRICS_DIR=<dir> to also write
+every rerun to <dir>/metrics.jsonl and keep <dir>/metrics.prom up to date in
+the Prometheus text format. When neither is set, `phase` returns a shared
+no-op context manager and `traced` returns the function unchanged.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+METRICS_DIR = os.environ.get("PROMPT_METRICS_DIR")
+ENABLED = bool(METRICS_DIR) or os.environ.get("PROMPT_METRICS", "") not in ("", "0")
+
+_NOOP = contextlib.nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+# Process-wide totals: counter name -> value, phase -> [seconds, count]
+_counters = {}
+_phases = {}
+
+
+def _current():
+    return getattr(_local, "run", None)
+
+
+def _record(name, seconds):
+    run = _current()
+    if run is not None:
+        run["phases"][name] = run["phases"].get(name, 0.0) + seconds
+    with _lock:
+        total = _phases.setdefault(name, [0.0, 0])
+        total[0] += seconds
+        total[1] += 1
+
+
+@contextlib.contextmanager
+def _timed(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def phase(name):
+    """
+    Time a block of code as one phase of the current run.
+    Args:
+        name (str): Phase name, e.g. "sections" or "preview"
+    Returns:
+        A context manager; a shared no-op one when instrumentation is off.
+    """
+    if not ENABLED:
+        return _NOOP
+    return _timed(name)
+
+
+def lap(name):
+    """
+    Record the time since the previous lap (or the start of the run) as phase `name`.
+    Lets a script be split into phases without re-indenting it under `phase`.
+    """
+    run = _current()
+    if not ENABLED or run is None:
+        return
+    now = time.perf_counter()
+    _record(name, now - run["lap"])
+    run["lap"] = time.perf_counter()
+
+
+def traced(name):
+    """
+    Decorator that times every call of a function as phase `name` and counts it.
+    When instrumentation is off the function is returned as is.
+    """
+    def decorate(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            count(f"{name}_calls")
+            with _timed(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, value=1):
+    """Add `value` to a process-wide counter and to the current run."""
+    if not ENABLED:
+        return
+    run = _current()
+    if run is not None:
+        run["counters"][name] = run["counters"].get(name, 0) + value
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def start_run():
+    """Begin collecting phases for a script run on this thread."""
+    if not ENABLED:
+        return
+    now = time.perf_counter()
+    _local.run = {"start": time.time(), "began": now, "lap": now, "phases": {}, "counters": {}}
+    count("reruns")
+
+
+def finish_run():
+    """
+    Close the current run and write it to the sinks.
+    Returns:
+        dict: The run's timestamp, total seconds, phases and counters; None when off.
+    """
+    run = _current()
+    if not ENABLED or run is None:
+        return None
+    _local.run = None
+    record = {
+        "timestamp": run["start"],
+        "seconds": time.perf_counter() - run["began"],
+        "phases": run["phases"],
+        "counters": run["counters"],
+    }
+    _record("rerun", record["seconds"])
+    if METRICS_DIR:
+        _write_sinks(record)
+    return record
+
+
+def snapshot():
+    """
+    Returns:
+        dict: Process-wide counters and per-phase {seconds, count} totals.
+    """
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "phases": {name: {"seconds": s, "count": n} for name, (s, n) in _phases.items()},
+        }
+
+
+def prometheus_text(totals=None):
+    """Format `snapshot()` in the Prometheus text exposition format."""
+    totals = totals or snapshot()
+    lines = []
+    for name, value in sorted(totals["counters"].items()):
+        lines.append(f"# TYPE prompt_{name}_total counter")
+        lines.append(f"prompt_{name}_total {value}")
+    lines.append("# TYPE prompt_phase_seconds summary")
+    for name, total in sorted(totals["phases"].items()):
+        lines.append(f'prompt_phase_seconds_sum{{phase="{name}"}} {total["seconds"]:.6f}')
+        lines.append(f'prompt_phase_seconds_count{{phase="{name}"}} {total["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+def _write_sinks(record):
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    line = json.dumps(record) + "\n"
+    text = prometheus_text()
+    with _lock:
+        with open(os.path.join(METRICS_DIR, "metrics.jsonl"), "a", encoding="utf-8") as f:
+            f.write(line)
+        tmp = os.path.join(METRICS_DIR, "metrics.prom.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, os.path.join(METRICS_DIR, "metrics.prom"))
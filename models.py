@@ -0,0 +1,142 @@
+"""
+Compact typed form records for bulk workloads.
+
+A `FormRecord` holds the same fields as a form dict in `__slots__`, with
+actions as a tuple of slotted `Action`s whose type is a shared `ActionType`
+member. Values are normalized once, when the record is built, so the
+renderer can use them without re-checking. `generate_prompt`,
+`generate_prompts` and `render_sections` accept records directly.
+"""
+import enum
+import json
+import sys
+from itertools import repeat
+
+from utils import DEFAULT_ACTION_TYPE, to_columns
+
+# Values up to this length are interned, so records repeating a domain or format share one string
+INTERN_MAX_LENGTH = 64
+# Positional order of FormRecord's fields
+_ORDER = ("domain", "specialization", "specificGoal", "details", "constraints", "action", "format", "structure", "unwantedResult")
+_FIELDS = frozenset(_ORDER) | {"id"}
+
+
+class ActionType(str, enum.Enum):
+    """Action types; each member is a single shared object that compares equal to its name."""
+    SEARCH = "Search"
+    LOOKUP = "Lookup"
+    BROWSE = "Browse"
+
+    __str__ = str.__str__
+    __format__ = str.__format__
+
+
+def text(value):
+    """Normalize a text field: empty values become "", short values are interned."""
+    if not value:
+        return ""
+    if not isinstance(value, str):
+        value = str(value)
+    return sys.intern(value) if len(value) <= INTERN_MAX_LENGTH else value
+
+
+class Action:
+    """One action step. The value is stripped; the type is an `ActionType`."""
+    __slots__ = ("type", "value")
+
+    def __init__(self, type=ActionType.SEARCH, value=""):
+        self.type = ActionType(type or DEFAULT_ACTION_TYPE)
+        self.value = text(str(value or "").strip())
+
+    def __repr__(self):
+        return f"Action({self.type.value!r}, {self.value!r})"
+
+    def to_dict(self):
+        return {"type": self.type.value, "value": self.value}
+
+
+def actions(value):
+    """
+    Normalize an action field into a tuple of non-empty `Action`s.
+    Args:
+        value: List of {"type", "value"} dicts or Actions, a JSON-encoded list,
+            or a newline-separated string of search queries
+    Returns:
+        tuple: The actions; the renderer skips empty ones, so they are dropped here.
+    Raises:
+        ValueError: For an unknown action type.
+    """
+    if not value:
+        return ()
+    if isinstance(value, str):
+        if value.lstrip().startswith("["):
+            value = json.loads(value)
+        else:
+            return tuple(Action(ActionType.SEARCH, v) for v in value.split("\n") if v.strip())
+    normalized = []
+    for a in value:
+        if isinstance(a, Action):
+            action = a
+        elif a:
+            action = Action(a.get("type"), a.get("value"))
+        else:
+            continue
+        if action.value:
+            normalized.append(action)
+    return tuple(normalized)
+
+
+class FormRecord:
+    """One form record; `get` gives the renderer the same access as on a dict."""
+    __slots__ = ("id",) + _ORDER
+
+    def __init__(self, domain="", specialization="", specificGoal="", details="", constraints="",
+                 action=(), format="", structure="", unwantedResult="", id=None):
+        self.id = id
+        self.domain = text(domain)
+        self.specialization = text(specialization)
+        self.specificGoal = text(specificGoal)
+        self.details = text(details)
+        self.constraints = text(constraints)
+        self.action = actions(action)
+        self.format = text(format)
+        self.structure = text(structure)
+        self.unwantedResult = text(unwantedResult)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in _FIELDS else default
+
+    def __repr__(self):
+        return f"FormRecord({', '.join(f'{k}={getattr(self, k)!r}' for k in self.__slots__ if getattr(self, k))})"
+
+    @classmethod
+    def from_dict(cls, form_data):
+        """Build a record from a form dict; unknown keys are ignored."""
+        get = form_data.get
+        return cls(*(get(key) for key in _ORDER), id=get("id"))
+
+    @classmethod
+    def from_json(cls, line):
+        """Build a record from one JSON object, e.g. a JSONL line."""
+        return cls.from_dict(json.loads(line))
+
+    @classmethod
+    def from_columns(cls, records):
+        """
+        Build records from columnar input.
+        Args:
+            records: A dict of lists, a pandas DataFrame, a pyarrow Table, or an iterable of form dicts
+        Returns:
+            list: One FormRecord per row.
+        """
+        columns, count = to_columns(records, _ORDER + ("id",))
+        rows = zip(*(columns.get(key) or repeat(None, count) for key in _ORDER + ("id",)))
+        return [cls(*row[:-1], id=row[-1]) for row in rows]
+
+    def to_dict(self):
+        form = {key: getattr(self, key) for key in _ORDER}
+        form["action"] = [a.to_dict() for a in self.action]
+        if self.id is not None:
+            form["id"] = self.id
+        return form
+
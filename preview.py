@@ -0,0 +1,143 @@
+import os
+import uuid
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from session_memory import resolve, spill
+from utils import SECTION_SEPARATOR
+
+_prompt_preview = components.declare_component(
+    "prompt_preview",
+    path=os.path.join(os.path.dirname(os.path.abspath(__file__)), "preview_component"),
+)
+
+
+def common_prefix_length(a, b, limit=None):
+    """Length of the longest common prefix of two strings, found by bisecting on slice comparisons."""
+    lo, hi = 0, min(len(a), len(b)) if limit is None else limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def common_suffix_length(a, b, limit):
+    """Length of the longest common suffix of two strings, at most `limit`."""
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:len(a) - lo] == b[len(b) - mid:len(b) - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def text_splice(old, new):
+    """
+    Describe `new` as a single edit of `old`.
+    Returns:
+        tuple: (start, end, insert) such that new == old[:start] + insert + old[end:].
+    """
+    prefix = common_prefix_length(old, new)
+    suffix = common_suffix_length(old, new, min(len(old), len(new)) - prefix)
+    return prefix, len(old) - suffix, new[prefix:len(new) - suffix]
+
+
+def section_edits(previous, sections):
+    """
+    Compare two renders of the prompt section by section.
+    Args:
+        previous (tuple): Sections last sent to the browser, or None
+        sections (tuple): Current sections
+    Returns:
+        list: [index, start, end, insert] splices for every section that differs;
+            without `previous`, every section is sent whole.
+    """
+    if previous is None or len(previous) != len(sections):
+        return [[i, 0, 0, text] for i, text in enumerate(sections)]
+    return [
+        [i, *text_splice(old, text)]
+        for i, (old, text) in enumerate(zip(previous, sections))
+        if old != text
+    ]
+
+
+def next_update(sections, key="prompt_preview", allow_full=True):
+    """
+    Work out what the browser needs to catch up with `sections`, and record it as sent.
+    Args:
+        sections (tuple): Current prompt sections
+        key (str): Key of the preview widget
+        allow_full (bool): If False, return None instead of a full copy
+    Returns:
+        dict: version, base, full, ops and count, or None.
+    """
+    sent = st.session_state.setdefault(f"_{key}_sent", {"version": 0, "sections": None, "resync": None})
+    # The browser asks for a full copy when it missed an update or was re-mounted
+    resync = (st.session_state.get(key) or {}).get("resync")
+    full = sent["sections"] is None or len(sent["sections"]) != len(sections) or resync != sent["resync"]
+    if full and not allow_full:
+        return None
+    # Large sent sections are kept on disk between reruns, see session_memory
+    ops = section_edits(None if full else tuple(resolve(s) for s in sent["sections"]), sections)
+    base = sent["version"]
+    if ops:
+        sent["version"] += 1
+        sent["sections"] = tuple(spill(s) for s in sections)
+        sent["resync"] = resync
+    return {"version": sent["version"], "base": base, "full": full, "ops": ops, "count": len(sections)}
+
+
+def _channel():
+    # Per-session name, so several open tabs never see each other's updates
+    return st.session_state.setdefault("_preview_channel", uuid.uuid4().hex)
+
+
+def prompt_preview(sections, file_name="prompt.txt", labels=None, key="prompt_preview"):
+    """
+    Show the prompt with copy and download buttons. The browser keeps the
+    prompt and only receives edits made since the previous rerun; copy and
+    download are served from that same copy.
+    Args:
+        sections (tuple): Prompt sections, see `utils.render_sections`
+        file_name (str): Name of the downloaded file
+        labels (dict): Button texts: copy, download, copied, copy_failed
+        key (str): Widget key; also namespaces what was sent in session state
+    """
+    _prompt_preview(
+        mode="preview",
+        channel=_channel(),
+        separator=SECTION_SEPARATOR,
+        file_name=file_name,
+        labels=labels or {},
+        key=key,
+        default=None,
+        **next_update(sections, key),
+    )
+
+
+def feed_preview(sections, key="prompt_preview", feed_key=None, active=True):
+    """
+    Push edits to a preview drawn elsewhere on the page, from inside a fragment
+    that reruns on its own and so cannot redraw the preview itself. The update
+    goes from this hidden frame to the preview frame over a BroadcastChannel.
+    Args:
+        sections (tuple): Current prompt sections
+        key (str): Key of the `prompt_preview` to update
+        feed_key (str): Widget key of this feeder, unique per fragment
+        active (bool): Send updates; pass False during full reruns, where the
+            preview itself is redrawn. The hidden frame is kept mounted either way.
+    """
+    update = next_update(sections, key, allow_full=False) if active else None
+    _prompt_preview(
+        mode="feed",
+        channel=_channel(),
+        update=update,
+        key=feed_key or f"{key}_feed",
+        default=None,
+    )
@@ -0,0 +1,379 @@
+import argparse
+import csv
+import json
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from prompt_store import PromptStoreWriter
+from render_cache import RenderCache
+from utils import render_columns, to_columns
+
+FORMATS = ("jsonl", "csv")
+DEFAULT_CHUNK_SIZE = 1000
+# Chunks buffered between pipeline stages; bounds memory when --pipeline is on
+PIPELINE_DEPTH = 4
+# Chunks in flight per worker process when --workers is set
+TASKS_PER_WORKER = 2
+_DONE = object()
+# Per-process cache used by --dedupe; each worker process builds its own
+_dedupe_cache = None
+
+
+def parse_action(value):
+    """
+    Normalize the `action` field read from a file.
+    Args:
+        value: A list of {"type", "value"} dicts, a JSON-encoded list, or a newline-separated string
+    Returns:
+        list | str: The value in a form `generate_prompt` accepts.
+    """
+    if isinstance(value, str) and value.lstrip().startswith("["):
+        try:
+            return json.loads(value)
+        except ValueError:
+            return value
+    return value
+
+
+def parse_record(record):
+    """
+    Normalize one record read from a file.
+    Args:
+        record (dict | str): Form record, or one raw JSONL line
+    Returns:
+        dict: The form record.
+    Raises:
+        ValueError: If the line is not valid JSON, or not a JSON object.
+    """
+    line = record
+    if isinstance(record, str):
+        record = json.loads(record)
+    if not isinstance(record, dict):
+        raise ValueError(f"expected a JSON object per record, got: {str(line).strip()[:200]}")
+    if "action" in record:
+        record["action"] = parse_action(record["action"])
+    return record
+
+
+def read_records(stream, fmt="jsonl", raw=False):
+    """
+    Read form records one at a time.
+    Args:
+        stream: Text stream to read from
+        fmt (str): 'jsonl' or 'csv'
+        raw (bool): Yield JSONL lines unparsed, leaving `parse_record` to the consumer
+    Yields:
+        dict | str: One form record.
+    """
+    if fmt == "csv":
+        rows = csv.DictReader(stream)
+    else:
+        rows = (line for line in stream if line.strip())
+        if raw:
+            yield from rows
+            return
+    for record in rows:
+        yield parse_record(record)
+
+
+def iter_chunks(records, size):
+    """
+    Group records into lists of at most `size`.
+    Args:
+        records (iterable): Form records
+        size (int): Chunk size
+    Yields:
+        list: The next chunk.
+    """
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def dedupe_cache(maxsize):
+    """Return this process's render cache, creating it on first use."""
+    global _dedupe_cache
+    if _dedupe_cache is None:
+        _dedupe_cache = RenderCache(maxsize)
+    return _dedupe_cache
+
+
+def render_chunk(chunk, lang="en", dedupe=0):
+    """
+    Render one chunk of records.
+    Args:
+        chunk (list): Form records, or raw JSONL lines
+        lang (str): 'en' for English, 'zh' for Chinese
+        dedupe (int): If set, size of an LRU that skips re-rendering duplicate records
+    Returns:
+        tuple: (chunk, prompts) with the chunk parsed into form records.
+    """
+    if chunk and isinstance(chunk[0], str):
+        chunk = [parse_record(line) for line in chunk]
+    if dedupe:
+        return chunk, dedupe_cache(dedupe).render_many(chunk, lang)
+    columns, count = to_columns(chunk)
+    return chunk, render_columns(columns, count, lang)
+
+
+def record_id(record, index):
+    """
+    Identify a record in the output.
+    Args:
+        record (dict): Form record
+        index (int): 1-based position of the record in the input
+    Returns:
+        str: The record's `id` field, or its position when it has none.
+    """
+    rid = record.get("id")
+    return str(rid) if rid not in (None, "") else str(index)
+
+
+class JsonlWriter:
+    """Write prompts as `{"id", "prompt"}` JSON lines."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    @staticmethod
+    def encode(start, chunk, prompts):
+        lines = []
+        for index, (record, prompt) in enumerate(zip(chunk, prompts), start):
+            lines.append(json.dumps({"id": record_id(record, index), "prompt": prompt}, ensure_ascii=False))
+            lines.append("\n")
+        return "".join(lines)
+
+    def write(self, payload):
+        self.stream.write(payload)
+
+    def close(self):
+        self.stream.flush()
+
+
+class DirectoryWriter:
+    """Write each prompt to `<out_dir>/<id>.txt`."""
+
+    def __init__(self, out_dir):
+        self.out_dir = out_dir
+        os.makedirs(out_dir, exist_ok=True)
+
+    @staticmethod
+    def encode(start, chunk, prompts):
+        return [
+            (record_id(record, index).replace(os.sep, "_"), prompt)
+            for index, (record, prompt) in enumerate(zip(chunk, prompts), start)
+        ]
+
+    def write(self, payload):
+        for name, prompt in payload:
+            with open(os.path.join(self.out_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+                f.write(prompt)
+
+    def close(self):
+        pass
+
+
+class StoreWriter:
+    """Write prompts to an offset-indexed store (see prompt_store), keyed by record ID."""
+
+    def __init__(self, path, append=False):
+        self.store = PromptStoreWriter(path, append=append)
+
+    @staticmethod
+    def encode(start, chunk, prompts):
+        return [
+            (record_id(record, index).encode("utf-8"), prompt.encode("utf-8"))
+            for index, (record, prompt) in enumerate(zip(chunk, prompts), start)
+        ]
+
+    def write(self, payload):
+        add = self.store.add_encoded
+        for key, data in payload:
+            add(key, data)
+
+    def close(self):
+        self.store.close()
+
+
+def render_task(task):
+    """
+    Render and encode one numbered chunk; the unit of work for every runner.
+    Args:
+        task (tuple): (start index, chunk, lang, dedupe, encode function)
+    Returns:
+        tuple: (number of records, encoded payload for the writer)
+    """
+    start, chunk, lang, dedupe, encode = task
+    chunk, prompts = render_chunk(chunk, lang, dedupe)
+    return len(chunk), encode(start, chunk, prompts)
+
+
+def iter_tasks(chunks, writer, lang="en", dedupe=0):
+    """Number each chunk by the 1-based index of its first record."""
+    start = 1
+    for chunk in chunks:
+        yield start, chunk, lang, dedupe, writer.encode
+        start += len(chunk)
+
+
+def run_serial(chunks, writer, lang="en", dedupe=0):
+    """
+    Read, render and write chunks one after another.
+    Returns:
+        int: Number of records written.
+    """
+    total = 0
+    for task in iter_tasks(chunks, writer, lang, dedupe):
+        count, payload = render_task(task)
+        writer.write(payload)
+        total += count
+    return total
+
+
+def _stage(work, source, sink, errors):
+    """Move items from `source` to `sink` through `work` until the end marker arrives."""
+    try:
+        for item in iter(source.get, _DONE):
+            if not errors:
+                sink.put(work(item))
+    except Exception as e:
+        errors.append(e)
+        # Keep draining so the reader is never left blocked on a full queue
+        for _ in iter(source.get, _DONE):
+            pass
+    finally:
+        sink.put(_DONE)
+
+
+def run_pipeline(chunks, writer, lang="en", dedupe=0):
+    """
+    Read, render and write on separate threads joined by bounded queues,
+    so file reads and writes overlap with rendering.
+    Returns:
+        int: Number of records written.
+    """
+    to_render = queue.Queue(PIPELINE_DEPTH)
+    to_write = queue.Queue(PIPELINE_DEPTH)
+    total = 0
+    errors = []
+
+    def read():
+        try:
+            for task in iter_tasks(chunks, writer, lang, dedupe):
+                if errors:
+                    break
+                to_render.put(task)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            to_render.put(_DONE)
+
+    threads = [
+        threading.Thread(target=read, daemon=True),
+        threading.Thread(target=_stage, args=(render_task, to_render, to_write, errors), daemon=True),
+    ]
+    for t in threads:
+        t.start()
+    for count, payload in iter(to_write.get, _DONE):
+        writer.write(payload)
+        total += count
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    return total
+
+
+def run_parallel(chunks, writer, lang="en", workers=None, dedupe=0):
+    """
+    Render chunks on a pool of worker processes and write them in input order.
+    Only a few chunks per worker are in flight at once, so memory stays flat.
+    Args:
+        chunks (iterable): Chunks of form records or raw JSONL lines
+        writer: JsonlWriter, DirectoryWriter or StoreWriter
+        lang (str): 'en' for English, 'zh' for Chinese
+        workers (int): Number of processes (default: CPU count)
+        dedupe (int): If set, size of the per-worker LRU that skips duplicate records
+    Returns:
+        int: Number of records written.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = iter_tasks(chunks, writer, lang, dedupe)
+    total = 0
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque(pool.submit(render_task, task) for task in islice(tasks, workers * TASKS_PER_WORKER))
+        while pending:
+            count, payload = pending.popleft().result()
+            for task in islice(tasks, 1):
+                pending.append(pool.submit(render_task, task))
+            writer.write(payload)
+            total += count
+    return total
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m prompt_cli",
+        description="Render structured prompts from JSONL/CSV form records.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="Input file, or '-' for stdin (default)")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (default: from the file extension, else jsonl)")
+    parser.add_argument("--lang", choices=("en", "zh"), default="en", help="Prompt language")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or '-' for stdout (default)")
+    parser.add_argument("--out-dir", help="Write one <id>.txt file per record into this directory instead of JSONL")
+    parser.add_argument("--store", help="Write an offset-indexed store (this data file plus .idx) instead of JSONL")
+    parser.add_argument("--append", action="store_true",
+                        help="With --store, add to an existing store; records with a stored ID replace it")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records rendered per batch")
+    parser.add_argument("--pipeline", action="store_true", help="Read, render and write on separate threads")
+    parser.add_argument("--dedupe", type=int, nargs="?", const=100_000, default=0, metavar="SIZE",
+                        help="Render each distinct record once, remembering up to SIZE prompts (default 100000)")
+    parser.add_argument("--workers", type=int, help="Render on this many processes; 0 means one per CPU")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    if args.input == "-":
+        source = sys.stdin
+    else:
+        source = open(args.input, encoding="utf-8", newline="" if fmt == "csv" else None)
+    if args.store:
+        writer = StoreWriter(args.store, append=args.append)
+    elif args.out_dir:
+        writer = DirectoryWriter(args.out_dir)
+    elif args.output == "-":
+        writer = JsonlWriter(sys.stdout)
+    else:
+        writer = JsonlWriter(open(args.output, "w", encoding="utf-8"))
+    parallel = args.workers is not None
+    # Workers parse JSONL themselves, so only raw lines cross the process boundary
+    chunks = iter_chunks(read_records(source, fmt, raw=parallel), max(1, args.chunk_size))
+    try:
+        if parallel:
+            total = run_parallel(chunks, writer, args.lang, args.workers, args.dedupe)
+        elif args.pipeline:
+            total = run_pipeline(chunks, writer, args.lang, args.dedupe)
+        else:
+            total = run_serial(chunks, writer, args.lang, args.dedupe)
+    finally:
+        writer.close()
+        if source is not sys.stdin:
+            source.close()
+        if isinstance(writer, JsonlWriter) and writer.stream is not sys.stdout:
+            writer.stream.close()
+    print(f"Rendered {total} prompts", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
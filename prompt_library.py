@@ -0,0 +1,230 @@
+"""
+Local SQLite library of saved form records and their rendered prompts.
+
+Every form field and the entry name are indexed with FTS5, so search and load
+stay in the milliseconds with millions of entries. Connections come from a
+small pool shared by all sessions of the app (see `views/library.py`).
+"""
+import contextlib
+import json
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+from instrumentation import traced
+from utils import SLOT_KEYS, generate_prompts
+
+DEFAULT_PATH = os.environ.get("PROMPT_LIBRARY", "prompt_library.db")
+POOL_SIZE = 4
+SEARCH_LIMIT = 20
+INDEX_COLUMNS = ("name",) + SLOT_KEYS
+
+SCHEMA = f"""
+PRAGMA journal_mode = WAL;
+CREATE TABLE IF NOT EXISTS prompts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    lang TEXT NOT NULL,
+    form TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    saved REAL NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS prompts_fts USING fts5({", ".join(INDEX_COLUMNS)}, content='');
+"""
+_INSERT_FTS = f"INSERT INTO prompts_fts(rowid, {', '.join(INDEX_COLUMNS)}) VALUES (?{', ?' * len(INDEX_COLUMNS)})"
+_DELETE_FTS = f"INSERT INTO prompts_fts(prompts_fts, rowid, {', '.join(INDEX_COLUMNS)}) VALUES ('delete', ?{', ?' * len(INDEX_COLUMNS)})"
+
+# Han, kana and hangul; the default tokenizer would keep a whole run of them as one word
+_CJK = re.compile(r"([\u1100-\u11ff\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff])")
+
+
+def index_text(value):
+    """
+    Flatten a field value for the index. CJK characters are spaced out so
+    that any run of them can be found, not only whole phrases.
+    Args:
+        value: Field value; actions are indexed by their values
+    Returns:
+        str: Text for the FTS column.
+    """
+    if isinstance(value, list):
+        value = "\n".join(str((a or {}).get("value", "")) for a in value)
+    return _CJK.sub(r" \1 ", str(value or ""))
+
+
+def index_row(name, form):
+    return [index_text(name)] + [index_text(form.get(key)) for key in SLOT_KEYS]
+
+
+def match_query(text):
+    """
+    Turn free text into an FTS5 query: every word must match. A word ending
+    in "*" matches as a prefix; that is slower, since FTS5 has to merge the
+    entries of every word sharing the prefix before it can stop.
+    Args:
+        text (str): What the user typed
+    Returns:
+        str: MATCH expression, or "" when nothing searchable was typed.
+    """
+    phrases = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*")
+        if re.search(r"\w", word):
+            phrase = '"' + " ".join(index_text(word).split()).replace('"', '""') + '"'
+            phrases.append(phrase + "*" if prefix else phrase)
+    return " ".join(phrases)
+
+
+def storable_form(form_data):
+    """Copy of a form record without UI-only data such as action IDs."""
+    form = dict(form_data or {})
+    if isinstance(form.get("action"), list):
+        form["action"] = [{"type": a.get("type"), "value": a.get("value", "")} for a in form["action"] if a]
+    return form
+
+
+class ConnectionPool:
+    """At most `size` SQLite connections, reused across threads and sessions."""
+
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    @contextlib.contextmanager
+    def connection(self):
+        """Borrow a connection; blocks while all of them are in use."""
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class PromptLibrary:
+    """Saved form records with their prompts, searchable by any field."""
+
+    def __init__(self, path=DEFAULT_PATH, pool_size=POOL_SIZE):
+        self.pool = ConnectionPool(path, pool_size)
+        with self.pool.connection() as conn:
+            conn.executescript(SCHEMA)
+
+    def save(self, form_data, name="", lang="en", prompt=None):
+        """
+        Save a form record.
+        Args:
+            form_data (dict): Form record
+            name (str): Entry name (default: the specific goal or domain)
+            lang (str): 'en' for English, 'zh' for Chinese
+            prompt (str): Rendered prompt, if already at hand
+        Returns:
+            int: ID of the new entry.
+        """
+        return self.save_many([(name, form_data)], lang, [prompt] if prompt is not None else None)[0]
+
+    def save_many(self, entries, lang="en", prompts=None):
+        """
+        Save many (name, form_data) pairs in one transaction.
+        Args:
+            entries (list): (name, form record) pairs
+            lang (str): 'en' for English, 'zh' for Chinese
+            prompts (list): Rendered prompts, if already at hand
+        Returns:
+            list: IDs of the new entries, in input order.
+        """
+        forms = [storable_form(form) for _, form in entries]
+        names = [name or form.get("specificGoal") or form.get("domain") or "" for (name, _), form in zip(entries, forms)]
+        if prompts is None:
+            prompts = generate_prompts(forms, lang)
+        now = time.time()
+        ids = []
+        with self.pool.connection() as conn, conn:
+            for name, form, prompt in zip(names, forms, prompts):
+                row_id = conn.execute(
+                    "INSERT INTO prompts(name, lang, form, prompt, saved) VALUES (?, ?, ?, ?, ?)",
+                    (name, lang, json.dumps(form, ensure_ascii=False), prompt, now),
+                ).lastrowid
+                conn.execute(_INSERT_FTS, [row_id] + index_row(name, form))
+                ids.append(row_id)
+        return ids
+
+    @traced("library_get")
+    def get(self, entry_id):
+        """
+        Returns:
+            dict: id, name, lang, form, prompt and saved (epoch seconds); None if missing.
+        """
+        with self.pool.connection() as conn:
+            row = conn.execute(
+                "SELECT id, name, lang, form, prompt, saved FROM prompts WHERE id = ?", (entry_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "name": row[1], "lang": row[2], "form": json.loads(row[3]), "prompt": row[4], "saved": row[5]}
+
+    @traced("library_search")
+    def search(self, text="", limit=SEARCH_LIMIT):
+        """
+        Find entries whose name or fields contain every word of `text`.
+        Newest entries come first; that order lets FTS5 stop after `limit`
+        matches instead of ranking all of them.
+        Args:
+            text (str): Search words; empty lists the newest entries
+            limit (int): Most entries returned
+        Returns:
+            list: dicts with id, name, lang and saved.
+        """
+        query = match_query(text)
+        with self.pool.connection() as conn:
+            if query:
+                rows = conn.execute(
+                    "SELECT id, name, lang, saved FROM prompts WHERE id IN ("
+                    " SELECT rowid FROM prompts_fts WHERE prompts_fts MATCH ? ORDER BY rowid DESC LIMIT ?"
+                    ") ORDER BY id DESC",
+                    (query, limit),
+                ).fetchall()
+            elif text.strip():
+                rows = []
+            else:
+                rows = conn.execute(
+                    "SELECT id, name, lang, saved FROM prompts ORDER BY id DESC LIMIT ?", (limit,)
+                ).fetchall()
+        return [{"id": r[0], "name": r[1], "lang": r[2], "saved": r[3]} for r in rows]
+
+    def delete(self, entry_id):
+        """Remove an entry and its index row. Returns True if it existed."""
+        with self.pool.connection() as conn, conn:
+            row = conn.execute("SELECT name, form FROM prompts WHERE id = ?", (entry_id,)).fetchone()
+            if row is None:
+                return False
+            # A contentless index needs the indexed values back to remove them
+            conn.execute(_DELETE_FTS, [entry_id] + index_row(row[0], json.loads(row[1])))
+            conn.execute("DELETE FROM prompts WHERE id = ?", (entry_id,))
+        return True
+
+    def count(self):
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT count(*) FROM prompts").fetchone()[0]
+
+    def close(self):
+        self.pool.close()
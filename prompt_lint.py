@@ -0,0 +1,449 @@
+"""
+Find prompts that went out half-filled, in rendered corpora or in the form
+records before rendering.
+
+    python -m prompt_lint prompts.jsonl > issues.jsonl          # output of prompt_cli
+    python -m prompt_lint corpus.prompts --workers 0            # a prompt store, one process per CPU
+    python -m prompt_lint records.jsonl --records --lang zh     # form records, before rendering
+
+Every record is checked for:
+- `placeholder`: a field left empty, so its placeholder (`{specific goal}`,
+  `{背景細節}`, ...) is in the prompt
+- `empty_actions`: no non-empty action, so the action list fell back to
+  `[Search("{action}")]`
+- `duplicate_action`: the same action (type and value) more than once
+- `oversized_section`: a section longer than `--max-section-bytes` in UTF-8
+- `unrecognized_layout`: a rendered prompt whose section headings are not
+  those of either template
+
+Records with issues are written as JSON lines `{"id", "record", "issues"}`,
+and a summary goes to stderr (and to `--summary` as JSON). The exit status
+is 1 when any record has an issue.
+
+Rendered JSONL and store files are split into byte or position ranges that
+worker processes check independently. Each line is first screened on its
+raw bytes; only the few that may have an issue are decoded and checked
+section by section, so a clean corpus is checked close to the speed it is
+read from disk.
+"""
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from prompt_cli import parse_record, read_records, record_id
+from prompt_store import INDEX_SUFFIX, PromptStore
+from utils import (
+    ACTION_NAMES,
+    DEFAULT_ACTION_TYPE,
+    PLACEHOLDERS,
+    SECTION_INPUTS,
+    SECTION_KEYS,
+    SECTION_SEPARATOR,
+    SECTION_SOURCES,
+    SECTION_TEMPLATES,
+    SLOT_RENDERERS,
+    render_action_lines,
+    render_template,
+)
+
+# Sections longer than this are reported; pasted documents usually are the cause
+MAX_SECTION_BYTES = 16 << 10
+# Bytes of a JSONL file, or prompts of a store, checked per task
+RANGE_BYTES = 16 << 20
+RANGE_RECORDS = 20_000
+ISSUE_CODES = ("placeholder", "empty_actions", "duplicate_action", "oversized_section", "unrecognized_layout")
+
+# First line of each section, per language
+SECTION_HEADERS = {
+    lang: {key: source.split("\n", 1)[0] for key, source in sections.items()}
+    for lang, sections in SECTION_SOURCES.items()
+}
+# Placeholder text -> the field it stands for; the action placeholder is reported as `empty_actions`
+PLACEHOLDER_FIELDS = {
+    lang: {text: key for key, text in placeholders.items() if key not in SLOT_RENDERERS}
+    for lang, placeholders in PLACEHOLDERS.items()
+}
+PLACEHOLDER_PATTERNS = {
+    lang: re.compile("|".join(map(re.escape, fields))) for lang, fields in PLACEHOLDER_FIELDS.items()
+}
+# What an action list with no non-empty action renders to
+EMPTY_ACTIONS = {lang: render_action_lines(None, lang) for lang in PLACEHOLDERS}
+# Literal text of the action section around the action lines
+ACTION_FRAMES = {lang: tuple(sections["action"].split("{action}")) for lang, sections in SECTION_SOURCES.items()}
+_ACTION_START = re.compile(r"\n(?=- \[)")
+
+
+def _screens(newline):
+    """
+    Byte patterns to screen prompts whose line breaks are written as
+    `newline`: a regex for any placeholder (also \\u-escaped, as JSON may
+    write it), and the start of an action line.
+    """
+    texts = set()
+    for placeholders in PLACEHOLDERS.values():
+        for text in placeholders.values():
+            texts.add(text.encode("utf-8"))
+            if newline != b"\n":
+                texts.add(json.dumps(text)[1:-1].encode("ascii"))
+    placeholder = re.compile(b"|".join(re.escape(t) for t in sorted(texts, key=len, reverse=True)))
+    return placeholder, newline + b"- [", newline
+
+
+SCREENS = {"jsonl": _screens(b"\\n"), "store": _screens(b"\n")}
+
+
+def issue(code, section=None, **detail):
+    found = {"code": code}
+    if section:
+        found["section"] = section
+    found.update(detail)
+    return found
+
+
+def text_bytes(text):
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def split_sections(prompt):
+    """
+    Cut a rendered prompt at its section headings.
+    Args:
+        prompt (str): Output of `generate_prompt`
+    Returns:
+        tuple: (lang, {section key: text}), or (None, None) when the headings are not those of a template.
+    """
+    for lang, headers in SECTION_HEADERS.items():
+        if not prompt.startswith(headers[SECTION_KEYS[0]]):
+            continue
+        sections = {}
+        start = 0
+        for key, following in zip(SECTION_KEYS, SECTION_KEYS[1:]):
+            end = prompt.find(SECTION_SEPARATOR + headers[following], start)
+            if end < 0:
+                return None, None
+            sections[key] = prompt[start:end]
+            start = end + len(SECTION_SEPARATOR)
+        sections[SECTION_KEYS[-1]] = prompt[start:]
+        return lang, sections
+    return None, None
+
+
+def duplicates(actions):
+    """Issues for actions that occur more than once, in order of first occurrence."""
+    counts = Counter(actions)
+    return [
+        issue("duplicate_action", "action", action=action, count=count)
+        for action, count in counts.items() if count > 1
+    ]
+
+
+def lint_prompt(prompt, max_section_bytes=MAX_SECTION_BYTES):
+    """
+    Check one rendered prompt.
+    Args:
+        prompt (str): Output of `generate_prompt` in either language
+        max_section_bytes (int): Longest acceptable section, in UTF-8 bytes
+    Returns:
+        list: One dict per issue, each with a `code` from ISSUE_CODES and, for most, a `section`.
+    """
+    lang, sections = split_sections(prompt)
+    if lang is None:
+        return [issue("unrecognized_layout")]
+    found = []
+    pattern, fields = PLACEHOLDER_PATTERNS[lang], PLACEHOLDER_FIELDS[lang]
+    for key, text in sections.items():
+        for field in dict.fromkeys(fields[m] for m in pattern.findall(text)):
+            found.append(issue("placeholder", key, field=field))
+        if key == "action":
+            head, tail = ACTION_FRAMES[lang]
+            block = text[len(head):len(text) - len(tail)] if text.startswith(head) and text.endswith(tail) else text
+            if block == EMPTY_ACTIONS[lang]:
+                found.append(issue("empty_actions", key))
+            else:
+                # "- [Type("value")]" lines; a value may itself span lines
+                found.extend(duplicates(line[3:-1] for line in _ACTION_START.split(block)))
+        if len(text) > max_section_bytes // 4 and text_bytes(text) > max_section_bytes:
+            found.append(issue("oversized_section", key, bytes=text_bytes(text)))
+    return found
+
+
+def record_actions(actions, lang="en"):
+    """
+    The actions a record renders, read the way `utils.render_action_lines` reads them.
+    Returns:
+        list: `Type("value")` strings as they appear in the prompt; empty when it would
+            fall back to the placeholder action.
+    """
+    names = ACTION_NAMES[lang]
+    if isinstance(actions, str):
+        pairs = ((DEFAULT_ACTION_TYPE, v) for v in actions.split("\n"))
+    elif isinstance(actions, list):
+        pairs = (((a or {}).get("type", DEFAULT_ACTION_TYPE), (a or {}).get("value", "")) for a in actions)
+    else:
+        return []
+    return [f"{names.get(t, t)}(\"{v.strip()}\")" for t, v in pairs if v.strip()]
+
+
+def lint_record(record, lang="en", max_section_bytes=MAX_SECTION_BYTES):
+    """
+    Check one form record before rendering. Reports what `lint_prompt` would
+    find in its prompt, except field text that merely looks like a placeholder.
+    Args:
+        record (dict): Form record, as read by `prompt_cli.read_records`
+        lang (str): 'en' for English, 'zh' for Chinese
+        max_section_bytes (int): Longest acceptable section, in UTF-8 bytes
+    Returns:
+        list: One dict per issue, see `lint_prompt`.
+    """
+    if lang != "zh":
+        lang = "en"
+    found = []
+    get = record.get
+    for key in SECTION_KEYS:
+        names = SECTION_INPUTS[key]
+        found.extend(issue("placeholder", key, field=name) for name in names if name not in SLOT_RENDERERS and not get(name))
+        values = [get(name) for name in names]
+        if key == "action":
+            values = record_actions(values[0], lang)
+            found.extend(duplicates(values) if values else [issue("empty_actions", key)])
+        # Render the section only when its inputs alone could make it too long
+        if 4 * sum(len(v) + 4 for v in values if isinstance(v, str)) + 512 > max_section_bytes:
+            size = text_bytes(render_template(SECTION_TEMPLATES[lang][key], record, lang))
+            if size > max_section_bytes:
+                found.append(issue("oversized_section", key, bytes=size))
+    return found
+
+
+def _suspect(prompt, screens, max_section_bytes):
+    """True unless the raw bytes of a prompt show it cannot have an issue."""
+    placeholder, action_start, newline = screens
+    if len(prompt) > max_section_bytes or placeholder.search(prompt):
+        return True
+    # Action lines are consecutive, so each piece after a split is one action; the last runs to the line end
+    actions = prompt.split(action_start)
+    if len(actions) < 3:
+        return False
+    actions[-1] = actions[-1].split(newline, 1)[0]
+    return len(set(actions)) < len(actions)
+
+
+def lint_range(task):
+    """
+    Check one range of a corpus; the unit of work for every runner.
+    Args:
+        task (tuple): (kind, path, start, stop, lang, max section bytes) where
+            kind is 'jsonl', 'store' or 'records' and start/stop are byte
+            offsets, or store positions. A JSONL range holds the lines that start in it.
+    Returns:
+        tuple: (records checked, bytes read, [(1-based record number in the range, id, issues)]).
+    """
+    kind, path, start, stop, lang, limit = task
+    results = []
+    if kind == "store":
+        screens = SCREENS["store"]
+        with PromptStore(path) as store:
+            read = 0
+            for position in range(start, stop):
+                prompt = bytes(store.view_at(position))
+                read += len(prompt)
+                if _suspect(prompt, screens, limit):
+                    found = lint_prompt(prompt.decode("utf-8"), limit)
+                    if found:
+                        results.append((position - start + 1, store.id_at(position), found))
+        return stop - start, read, results
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return 0, 0, results
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # Move both ends to the start of the line they fall in
+            first = data.rfind(b"\n", 0, start) + 1 if start else 0
+            last = data.rfind(b"\n", 0, stop) + 1 if stop < size else size
+            if last <= first:
+                return 0, 0, results
+            chunk = data[first:last]
+    screens = SCREENS["jsonl"]
+    count = 0
+    for line in chunk.split(b"\n"):
+        if not line.strip():
+            continue
+        count += 1
+        if kind == "records":
+            record = parse_record(line.decode("utf-8"))
+            found = lint_record(record, lang, limit)
+            rid = record.get("id")
+        elif _suspect(line, screens, limit):
+            entry = json.loads(line)
+            found = lint_prompt(entry.get("prompt") or "", limit)
+            rid = entry.get("id")
+        else:
+            continue
+        if found:
+            results.append((count, rid, found))
+    return count, len(chunk), results
+
+
+def plan(path, kind, lang="en", max_section_bytes=MAX_SECTION_BYTES):
+    """
+    Split a corpus into tasks for `lint_range`.
+    Yields:
+        tuple: One task per range, in file order.
+    """
+    if kind == "store":
+        with PromptStore(path) as store:
+            total = len(store)
+        for start in range(0, total, RANGE_RECORDS):
+            yield kind, path, start, min(total, start + RANGE_RECORDS), lang, max_section_bytes
+        return
+    size = os.path.getsize(path)
+    for start in range(0, size, RANGE_BYTES):
+        yield kind, path, start, min(size, start + RANGE_BYTES), lang, max_section_bytes
+
+
+def lint_stream(stream, fmt="jsonl", records=False, lang="en", max_section_bytes=MAX_SECTION_BYTES):
+    """
+    Check a corpus read from a text stream (stdin, or CSV records) in one process.
+    Yields:
+        tuple: (1-based record number, id, issues) for each record, clean or not.
+    """
+    for index, item in enumerate(read_records(stream, fmt, raw=not records), 1):
+        if records:
+            yield index, item.get("id"), lint_record(item, lang, max_section_bytes)
+        else:
+            entry = item if isinstance(item, dict) else json.loads(item)
+            yield index, entry.get("id"), lint_prompt(entry.get("prompt") or "", max_section_bytes)
+
+
+class Summary:
+    """Totals of a run, reported on stderr and with --summary."""
+
+    def __init__(self):
+        self.records = 0
+        self.bytes = 0
+        self.flagged = 0
+        self.issues = Counter()
+        self.fields = Counter()
+        self.sections = Counter()
+        self.start = time.perf_counter()
+
+    def add(self, found):
+        self.flagged += 1
+        for item in found:
+            self.issues[item["code"]] += 1
+            if item["code"] == "placeholder":
+                self.fields[item["field"]] += 1
+            elif item["code"] == "oversized_section":
+                self.sections[item["section"]] += 1
+
+    def to_dict(self):
+        seconds = time.perf_counter() - self.start
+        return {
+            "records": self.records,
+            "records_with_issues": self.flagged,
+            "issues": dict(self.issues.most_common()),
+            "placeholder_fields": dict(self.fields.most_common()),
+            "oversized_sections": dict(self.sections.most_common()),
+            "bytes": self.bytes,
+            "seconds": seconds,
+            "mb_per_sec": self.bytes / seconds / 1e6 if seconds else 0,
+        }
+
+
+def run(path, kind, out, lang="en", max_section_bytes=MAX_SECTION_BYTES, workers=None):
+    """
+    Check a corpus file and write one JSON line per record with issues.
+    Args:
+        path (str): JSONL file, or the data file of a prompt store
+        kind (str): 'jsonl' for rendered prompts, 'store', or 'records' for form records
+        out: Text stream for the per-record results
+        lang (str): Language the records are rendered in ('records' only)
+        max_section_bytes (int): Longest acceptable section, in UTF-8 bytes
+        workers (int): Number of processes (None checks in this process; 0 means one per CPU)
+    Returns:
+        Summary: Totals of the run.
+    """
+    summary = Summary()
+    tasks = plan(path, kind, lang, max_section_bytes)
+    if workers is None:
+        results = map(lint_range, tasks)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(workers or os.cpu_count() or 1)
+        results = pool.map(lint_range, tasks)
+    try:
+        # Ranges come back in file order, so record numbers continue from the ranges before
+        for count, read, found in results:
+            for number, rid, issues in found:
+                index = summary.records + number
+                out.write(json.dumps({"id": record_id({"id": rid}, index), "record": index, "issues": issues},
+                                     ensure_ascii=False) + "\n")
+                summary.add(issues)
+            summary.records += count
+            summary.bytes += read
+    finally:
+        if pool:
+            pool.shutdown()
+    return summary
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m prompt_lint",
+        description="Find leftover placeholders, empty or duplicate actions and oversized sections in prompt corpora.",
+    )
+    parser.add_argument("input", nargs="?", default="-",
+                        help="Rendered JSONL {id, prompt}, a prompt store, or with --records form records; '-' for stdin")
+    parser.add_argument("--records", action="store_true", help="Input holds form records to check before rendering")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="Format of --records input (default: from the extension)")
+    parser.add_argument("--lang", choices=("en", "zh"), default="en", help="Language --records are rendered in")
+    parser.add_argument("--max-section-bytes", type=int, default=MAX_SECTION_BYTES,
+                        help="Report sections longer than this many UTF-8 bytes")
+    parser.add_argument("-o", "--output", default="-", help="JSONL file for records with issues, or '-' for stdout")
+    parser.add_argument("--summary", help="Also write the summary as JSON to this file")
+    parser.add_argument("--workers", type=int, help="Check ranges of the file on this many processes; 0 means one per CPU")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        if args.input == "-" or fmt == "csv":
+            # Streams and CSV (whose quoted values may span lines) cannot be split into ranges
+            source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8", newline="")
+            summary = Summary()
+            for index, rid, issues in lint_stream(source, fmt, args.records, args.lang, args.max_section_bytes):
+                summary.records += 1
+                if issues:
+                    out.write(json.dumps({"id": record_id({"id": rid}, index), "record": index, "issues": issues},
+                                         ensure_ascii=False) + "\n")
+                    summary.add(issues)
+            if source is not sys.stdin:
+                summary.bytes = os.path.getsize(args.input)
+                source.close()
+        else:
+            kind = "records" if args.records else "store" if os.path.exists(args.input + INDEX_SUFFIX) else "jsonl"
+            summary = run(args.input, kind, out, args.lang, args.max_section_bytes, args.workers)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    report = summary.to_dict()
+    issues = ", ".join(f"{code} {n:,}" for code, n in report["issues"].items()) or "none"
+    speed = f" ({report['mb_per_sec']:,.0f} MB/s)" if report["bytes"] else ""
+    print(f"Checked {report['records']:,} records{speed}: "
+          f"{report['records_with_issues']:,} with issues ({issues})", file=sys.stderr)
+    if args.summary:
+        with open(args.summary, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return 1 if report["records_with_issues"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,364 @@
+"""
+Re-render only the prompts of a store that a change to the records or the
+templates affects.
+
+    python -m prompt_rebuild records.jsonl --store corpus.prompts              # first run renders everything
+    python -m prompt_rebuild records.jsonl --store corpus.prompts --workers 0  # later runs patch what changed
+    python -m prompt_rebuild records.jsonl --store corpus.prompts --dry-run    # only report what would change
+
+Next to the store, `corpus.prompts.manifest` records the language, a
+version hash of each template section, and for each record a hash of its
+input and the UTF-8 length of each section of its prompt. On the next run:
+- a record whose input hash is unchanged, while no section template
+  changed, is skipped without being parsed or rendered
+- a record whose input changed is rendered again in full
+- when only section templates changed, only those sections are rendered
+  and spliced between the unchanged sections of the stored prompt
+
+Parsing, rendering and splicing run on `--workers` processes like
+`prompt_cli --workers`; hashing, the manifest and the store writer stay in
+this process.
+
+New and changed prompts are written to the store with `append=True`, so
+they keep their positions and the rest of the store is not rewritten.
+Records that are no longer in the input stay in the store, but are dropped
+from the manifest. `python -m prompt_store corpus.prompts compact` removes
+the replaced text afterwards.
+
+A section's version covers its template text, the placeholders of its
+fields, and for the action and output sections the code and tables that
+render their slots. An edit to `render_action_lines` therefore re-renders
+only the action sections.
+"""
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from json.encoder import encode_basestring
+
+from prompt_cli import DEFAULT_CHUNK_SIZE, TASKS_PER_WORKER, iter_chunks, parse_record, read_records, record_id
+from prompt_store import INDEX_SUFFIX, PromptStore, PromptStoreWriter
+from utils import (
+    ACTION_NAMES,
+    DEFAULT_ACTION_TYPE,
+    PLACEHOLDERS,
+    SECTION_INPUTS,
+    SECTION_KEYS,
+    SECTION_SEPARATOR,
+    SECTION_SOURCES,
+    SECTION_TEMPLATES,
+    SLOT_RENDERERS,
+    STRUCTURE_CLAUSES,
+    render_section,
+    render_template,
+)
+
+MANIFEST_SUFFIX = ".manifest"
+MANIFEST_VERSION = 2
+# Tables a computed slot reads besides its renderer's code
+SLOT_TABLES = {
+    "action": lambda lang: [ACTION_NAMES[lang], DEFAULT_ACTION_TYPE],
+    "structure": lambda lang: list(STRUCTURE_CLAUSES[lang]),
+}
+_SEPARATOR = SECTION_SEPARATOR.encode("utf-8")
+# Old store of the rebuild in progress, opened once per process by `_open_store`
+_store = None
+
+
+def digest(data):
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def section_versions(lang="en"):
+    """
+    Version hash of each template section.
+    Args:
+        lang (str): 'en' for English, 'zh' for Chinese
+    Returns:
+        dict: {section key: hex digest}; a digest changes whenever the text the section renders to could.
+    """
+    versions = {}
+    for key in SECTION_KEYS:
+        parts = [lang, SECTION_SOURCES[lang][key]]
+        for name in SECTION_INPUTS[key]:
+            if name in SLOT_RENDERERS:
+                parts += [inspect.getsource(SLOT_RENDERERS[name]), SLOT_TABLES[name](lang), PLACEHOLDERS[lang].get(name)]
+            else:
+                parts.append(PLACEHOLDERS[lang][name])
+        versions[key] = digest(json.dumps(parts, ensure_ascii=False).encode("utf-8"))
+    return versions
+
+
+def input_hash(record):
+    """
+    Hash of one record as read from the input.
+    Args:
+        record (str | dict): Raw JSONL line, or a CSV row
+    Returns:
+        str: Hex digest. JSONL lines are hashed as written, so reformatting a line counts as a change.
+    """
+    if isinstance(record, dict):
+        record = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return digest(record.strip().encode("utf-8"))
+
+
+class Manifest:
+    """The language, section versions and per-record entries a store was rendered with."""
+
+    def __init__(self, lang="en", sections=None, records=None):
+        self.lang = lang
+        self.sections = sections or {}
+        # record ID -> (input hash, comma-separated UTF-8 length of each section,
+        #               whether the ID is the record's position because it has no `id`)
+        self.records = records if records is not None else {}
+
+    @classmethod
+    def load(cls, path):
+        """
+        Returns:
+            Manifest | None: The manifest at `path`, or None when there is none or it has another format version.
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("version") != MANIFEST_VERSION:
+                return None
+            records = {}
+            # One "hash<TAB>lengths<TAB>p if positional<TAB>JSON string of the ID" line per record
+            for line in f:
+                hashed, lengths, positional, rid = line.rstrip("\n").split("\t", 3)
+                records[rid[1:-1] if "\\" not in rid else json.loads(rid)] = (hashed, lengths, positional == "p")
+        return cls(header["lang"], header["sections"], records)
+
+    def save(self, path):
+        """Write the manifest next to the old one and swap it in."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(json.dumps({"version": MANIFEST_VERSION, "lang": self.lang, "sections": self.sections}) + "\n")
+            lines = (
+                f"{hashed}\t{lengths}\t{'p' if positional else ''}\t{encode_basestring(rid)}\n"
+                for rid, (hashed, lengths, positional) in self.records.items()
+            )
+            for batch in iter(lambda: "".join(islice(lines, 10_000)), ""):
+                f.write(batch)
+        os.replace(tmp, path)
+
+
+def splice(data, lengths, replacements):
+    """
+    Replace some sections of a stored prompt, copying the rest as they are.
+    Args:
+        data (bytes | memoryview): The prompt as UTF-8 bytes
+        lengths (str): Comma-separated UTF-8 length of each section, from the manifest
+        replacements (dict): {section index: new UTF-8 text}
+    Returns:
+        tuple: (new prompt bytes, new comma-separated lengths), or None when the lengths do not describe `data`.
+    """
+    lengths = [int(n) for n in lengths.split(",")]
+    if len(lengths) != len(SECTION_KEYS) or sum(lengths) + len(_SEPARATOR) * (len(lengths) - 1) != len(data):
+        return None
+    pieces = []
+    start = copied = 0
+    for i, length in enumerate(lengths):
+        if i in replacements:
+            # Copy the unchanged run before this section in one slice
+            pieces.append(data[copied:start])
+            pieces.append(replacements[i])
+            lengths[i] = len(replacements[i])
+            copied = start + length
+        start += length + len(_SEPARATOR)
+    pieces.append(data[copied:])
+    return b"".join(pieces), ",".join(map(str, lengths))
+
+
+def _open_store(path):
+    """Open the store being rebuilt in this process; the pool initializer of `rebuild`."""
+    global _store
+    if _store is not None:
+        _store.close()
+    _store = PromptStore(path) if path else None
+
+
+def rebuild_task(task):
+    """
+    Render one chunk of records; the unit of work for every runner.
+    Args:
+        task (tuple): (lang, stale section indexes, jobs) where each job is
+            (index, raw record, input hash, position, lengths). A job with a
+            position patches the stale sections of the prompt stored there;
+            one without is rendered in full.
+    Returns:
+        list: (record ID, input hash, prompt bytes, lengths, positional ID, patched) per job.
+    """
+    lang, stale, jobs = task
+    templates = SECTION_TEMPLATES[lang]
+    results = []
+    for index, raw, hashed, position, lengths in jobs:
+        record = parse_record(raw)
+        rid = record_id(record, index)
+        positional = record.get("id") in (None, "")
+        if position is not None:
+            replacements = {i: render_section(record, SECTION_KEYS[i], lang).encode("utf-8") for i in stale}
+            patched = splice(_store.view_at(position), lengths, replacements)
+            if patched is not None:
+                results.append((rid, hashed, *patched, positional, True))
+                continue
+        # Whole records are mostly unique, so they skip the section cache
+        sections = [render_template(templates[key], record, lang).encode("utf-8") for key in SECTION_KEYS]
+        lengths = ",".join(str(len(s)) for s in sections)
+        results.append((rid, hashed, _SEPARATOR.join(sections), lengths, positional, False))
+    return results
+
+
+def _in_order(pool, tasks, depth):
+    """Run tasks on a pool with at most `depth` in flight, yielding results in task order."""
+    pending = deque(pool.submit(rebuild_task, task) for task in islice(tasks, depth))
+    while pending:
+        result = pending.popleft().result()
+        for task in islice(tasks, 1):
+            pending.append(pool.submit(rebuild_task, task))
+        yield result
+
+
+def rebuild(records, store_path, lang="en", manifest_path=None, force=False, dry_run=False, workers=None):
+    """
+    Bring a store up to date with `records` and the current templates.
+    Args:
+        records (iterable): Raw JSONL lines or CSV rows, as `prompt_cli.read_records(..., raw=True)` yields them
+        store_path (str): Data file of the store; created when missing
+        lang (str): 'en' for English, 'zh' for Chinese
+        manifest_path (str): Manifest file (default: `store_path + ".manifest"`)
+        force (bool): Render every record in full, as if there were no manifest
+        dry_run (bool): Count what would change without writing anything
+        workers (int): Render on this many processes (None renders in this process; 0 means one per CPU)
+    Returns:
+        dict: Counts of `records`, `unchanged`, `added`, `changed` (inputs changed), `patched`
+            (only sections re-rendered), `removed` (in the manifest but not the input),
+            and the list of `changed_sections`.
+    """
+    if lang != "zh":
+        lang = "en"
+    manifest_path = manifest_path or store_path + MANIFEST_SUFFIX
+    versions = section_versions(lang)
+    old = None if force or not os.path.exists(store_path + INDEX_SUFFIX) else Manifest.load(manifest_path)
+    if old is not None and old.lang != lang:
+        old = None
+    changed_sections = [key for key in SECTION_KEYS if old is None or old.sections.get(key) != versions[key]]
+    stale = [SECTION_KEYS.index(key) for key in changed_sections]
+    previous = old.records if old is not None else {}
+    # Input hash -> ID, so records with unchanged input are recognized without parsing them
+    known = {entry[0]: rid for rid, entry in previous.items()}
+    manifest = Manifest(lang, versions)
+    entries = manifest.records
+    counts = Counter()
+    index_of = PromptStore(store_path) if old is not None else None
+
+    def jobs():
+        for index, raw in enumerate(records, 1):
+            counts["records"] += 1
+            hashed = input_hash(raw)
+            rid = known.get(hashed)
+            if rid is not None and previous[rid][2] and rid != str(index):
+                # A record without `id` is keyed by its position, which moved; identical such records share a hash
+                here = previous.get(str(index))
+                rid = str(index) if here and here[0] == hashed and here[2] else None
+            if rid is not None:
+                if not stale:
+                    counts["unchanged"] += 1
+                    entries[rid] = previous[rid]
+                    continue
+                position = index_of.position(rid)
+                if position >= 0:
+                    yield index, raw, hashed, position, previous[rid][1]
+                    continue
+            yield index, raw, hashed, None, None
+
+    tasks = ((lang, stale, chunk) for chunk in iter_chunks(jobs(), DEFAULT_CHUNK_SIZE))
+    # Opened on the first write, so a run with nothing to update leaves the store as it is
+    writer = None if dry_run or old is not None else PromptStoreWriter(store_path)
+    pool = None
+    try:
+        if workers is None:
+            _open_store(store_path if old is not None else None)
+            results = map(rebuild_task, tasks)
+        else:
+            workers = workers or os.cpu_count() or 1
+            pool = ProcessPoolExecutor(workers, initializer=_open_store,
+                                       initargs=(store_path if old is not None else None,))
+            results = _in_order(pool, tasks, workers * TASKS_PER_WORKER)
+        for chunk in results:
+            for rid, hashed, prompt, lengths, positional, patched in chunk:
+                counts["patched" if patched else "changed" if rid in previous else "added"] += 1
+                entries[rid] = (hashed, lengths, positional)
+                if not dry_run:
+                    if writer is None:
+                        writer = PromptStoreWriter(store_path, append=True)
+                    writer.add_encoded(rid.encode("utf-8"), prompt)
+    except BaseException:
+        if writer:
+            writer.abort()
+        raise
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+        else:
+            _open_store(None)
+        if index_of:
+            index_of.close()
+    if writer:
+        writer.close()
+    if not dry_run:
+        manifest.save(manifest_path)
+    counts["removed"] = sum(1 for rid in previous if rid not in entries)
+    result = {key: counts[key] for key in ("records", "unchanged", "added", "changed", "patched", "removed")}
+    result["changed_sections"] = changed_sections
+    return result
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m prompt_rebuild",
+        description="Re-render only the prompts of a store whose records or section templates changed.",
+    )
+    parser.add_argument("input", nargs="?", default="-", help="JSONL/CSV form records, or '-' for stdin (default)")
+    parser.add_argument("--store", required=True, help="Data file of the store to bring up to date")
+    parser.add_argument("--manifest", help="Manifest file (default: the store path plus .manifest)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="Input format (default: from the file extension, else jsonl)")
+    parser.add_argument("--lang", choices=("en", "zh"), default="en", help="Prompt language")
+    parser.add_argument("--force", action="store_true", help="Render every record again, ignoring the manifest")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    parser.add_argument("--workers", type=int, help="Render on this many processes; 0 means one per CPU")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    fmt = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    if args.input == "-":
+        source = sys.stdin
+    else:
+        source = open(args.input, encoding="utf-8", newline="" if fmt == "csv" else None)
+    start = time.perf_counter()
+    try:
+        result = rebuild(read_records(source, fmt, raw=True), args.store, args.lang, args.manifest,
+                         args.force, args.dry_run, args.workers)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+    sections = ", ".join(result["changed_sections"]) or "none"
+    print(f"{'Would update' if args.dry_run else 'Updated'} {args.store} from {result['records']:,} records "
+          f"in {time.perf_counter() - start:.1f}s: {result['unchanged']:,} unchanged, {result['added']:,} added, "
+          f"{result['changed']:,} changed, {result['patched']:,} patched, {result['removed']:,} no longer in the input; "
+          f"changed sections: {sections}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+HTTP service that renders prompts for other programs.
+
+    python -m prompt_server --port 8000
+
+    POST /render?lang=en         one form record (JSON object) -> {"prompt": "..."}
+    POST /render/batch?lang=en   JSON array or JSONL of records -> JSONL {"id", "prompt"}, streamed;
+                                 a record that cannot be rendered gets {"id", "error"} instead
+    GET  /healthz
+    GET  /metrics                Prometheus text, when PROMPT_METRICS is on
+
+Concurrent /render requests are collected into micro-batches and rendered
+together with `generate_prompts`. Connections are kept alive between
+requests. The server runs on Tornado, which is installed with Streamlit.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+import tornado.httpserver
+import tornado.web
+
+import instrumentation
+from prompt_cli import DEFAULT_CHUNK_SIZE, JsonlWriter, iter_chunks, parse_record, record_id, render_task
+from utils import generate_prompt, generate_prompts
+
+LANGS = ("en", "zh")
+# Most single renders collected into one generate_prompts call
+MAX_BATCH = 256
+# Seconds a micro-batch waits for more requests; 0 only takes what already arrived
+MAX_DELAY = 0.0
+# Seconds an idle keep-alive connection stays open
+IDLE_TIMEOUT = 60
+MAX_BODY_SIZE = 256 << 20
+
+
+class MicroBatcher:
+    """
+    Collect single render requests arriving at the same time and render them
+    with one `generate_prompts` call per language. A record that fails to
+    render only fails its own request.
+    """
+
+    def __init__(self, max_batch=MAX_BATCH, max_delay=MAX_DELAY):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = None
+        self._task = None
+
+    async def render(self, record, lang="en"):
+        """
+        Render one record as part of the next micro-batch.
+        Args:
+            record (dict): Form record
+            lang (str): 'en' for English, 'zh' for Chinese
+        Returns:
+            str: The generated prompt string.
+        """
+        if self._task is None:
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((record, lang, future))
+        return await future
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            # Let the handlers that are already runnable add their records first
+            await asyncio.sleep(self.max_delay)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            self._flush(batch)
+
+    def _flush(self, batch):
+        instrumentation.count("server_batches")
+        instrumentation.count("server_batched_records", len(batch))
+        by_lang = {}
+        for item in batch:
+            by_lang.setdefault(item[1], []).append(item)
+        for lang, items in by_lang.items():
+            try:
+                prompts = generate_prompts([record for record, _, _ in items], lang)
+            except Exception:
+                prompts = None
+            for i, (record, _, future) in enumerate(items):
+                if future.done():  # client went away
+                    continue
+                if prompts is not None:
+                    future.set_result(prompts[i])
+                    continue
+                try:
+                    future.set_result(generate_prompt(record, lang))
+                except Exception as e:
+                    future.set_exception(e)
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def render_each(start, chunk, lang="en"):
+    """
+    Render a chunk one record at a time, after rendering it as a whole failed.
+    Args:
+        start (int): 1-based index of the chunk's first record
+        chunk (list): Form records
+        lang (str): 'en' for English, 'zh' for Chinese
+    Returns:
+        str: JSONL with {"id", "prompt"} for each good record and {"id", "error"} for each bad one.
+    """
+    lines = []
+    for index, record in enumerate(chunk, start):
+        try:
+            line = {"id": record_id(record, index), "prompt": generate_prompt(record, lang)}
+        except Exception as e:
+            line = {"id": record_id(record, index), "error": f"cannot render record: {e}"}
+        lines.append(json.dumps(line, ensure_ascii=False))
+        lines.append("\n")
+    return "".join(lines)
+
+
+class RequestError(tornado.web.HTTPError):
+    """An HTTP error whose message is returned to the client as {"error": message}."""
+
+    def __init__(self, status_code, message):
+        super().__init__(status_code, "%s", message)
+        self.message = message
+
+
+class BaseHandler(tornado.web.RequestHandler):
+
+    def lang(self):
+        lang = self.get_query_argument("lang", "en")
+        if lang not in LANGS:
+            raise RequestError(400, f"lang must be one of {', '.join(LANGS)}")
+        return lang
+
+    def write_json(self, value):
+        self.set_header("Content-Type", "application/json; charset=utf-8")
+        self.write(json.dumps(value, ensure_ascii=False))
+
+    def write_error(self, status_code, **kwargs):
+        error = kwargs.get("exc_info", (None, None, None))[1]
+        self.write_json({"error": getattr(error, "message", self._reason)})
+
+
+class RenderHandler(BaseHandler):
+    """POST /render: one record in, one prompt out."""
+
+    def initialize(self, batcher):
+        self.batcher = batcher
+
+    async def post(self):
+        lang = self.lang()
+        try:
+            record = parse_record(self.request.body.decode("utf-8"))
+        except (ValueError, TypeError):
+            raise RequestError(400, "body must be a JSON form record")
+        if not isinstance(record, dict):
+            raise RequestError(400, "body must be a JSON object")
+        instrumentation.count("server_render_requests")
+        try:
+            prompt = await self.batcher.render(record, lang)
+        except Exception as e:
+            raise RequestError(422, f"cannot render record: {e}")
+        self.write_json({"prompt": prompt})
+
+
+class BatchHandler(BaseHandler):
+    """POST /render/batch: many records in, JSONL out, written chunk by chunk."""
+
+    def initialize(self, chunk_size):
+        self.chunk_size = chunk_size
+
+    def records(self):
+        body = self.request.body.decode("utf-8")
+        try:
+            if body.lstrip().startswith("["):
+                records = [parse_record(r) for r in json.loads(body)]
+            else:
+                records = [parse_record(line) for line in body.splitlines() if line.strip()]
+        except (ValueError, TypeError):
+            raise RequestError(400, "body must be a JSON array or JSONL of form records")
+        if not all(isinstance(r, dict) for r in records):
+            raise RequestError(400, "every record must be a JSON object")
+        return records
+
+    async def post(self):
+        lang = self.lang()
+        records = self.records()
+        instrumentation.count("server_batch_requests")
+        instrumentation.count("server_batch_records", len(records))
+        self.set_header("Content-Type", "application/x-ndjson; charset=utf-8")
+        loop = asyncio.get_running_loop()
+        start = 1
+        for chunk in iter_chunks(records, self.chunk_size):
+            # Render off the event loop so single /render requests keep being served
+            try:
+                _, payload = await loop.run_in_executor(None, render_task, (start, chunk, lang, 0, JsonlWriter.encode))
+            except Exception:
+                # Like /render, a bad record only fails itself: its line carries the error
+                payload = await loop.run_in_executor(None, render_each, start, chunk, lang)
+            self.write(payload)
+            await self.flush()
+            start += len(chunk)
+
+
+class HealthHandler(BaseHandler):
+
+    def get(self):
+        self.write_json({"status": "ok"})
+
+
+class MetricsHandler(BaseHandler):
+
+    def get(self):
+        if not instrumentation.ENABLED:
+            raise RequestError(404, "metrics are off; set PROMPT_METRICS=1")
+        self.set_header("Content-Type", "text/plain; version=0.0.4")
+        self.write(instrumentation.prometheus_text())
+
+
+def make_app(batcher=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Build the Tornado application.
+    Args:
+        batcher (MicroBatcher): Shared batcher for /render (default: a new one)
+        chunk_size (int): Records rendered and flushed at a time by /render/batch
+    Returns:
+        tornado.web.Application
+    """
+    return tornado.web.Application([
+        (r"/render", RenderHandler, {"batcher": batcher or MicroBatcher()}),
+        (r"/render/batch", BatchHandler, {"chunk_size": chunk_size}),
+        (r"/healthz", HealthHandler),
+        (r"/metrics", MetricsHandler),
+    ])
+
+
+async def serve(host="127.0.0.1", port=8000, max_batch=MAX_BATCH, max_delay=MAX_DELAY, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Run the service until cancelled."""
+    batcher = MicroBatcher(max_batch, max_delay)
+    server = tornado.httpserver.HTTPServer(
+        make_app(batcher, chunk_size),
+        idle_connection_timeout=IDLE_TIMEOUT,
+        max_body_size=MAX_BODY_SIZE,
+    )
+    server.listen(port, host)
+    print(f"Serving prompts on http://{host}:{port}", file=sys.stderr)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        server.stop()
+        batcher.close()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m prompt_server", description="Serve prompt rendering over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="Most /render requests rendered together")
+    parser.add_argument("--batch-delay", type=float, default=MAX_DELAY * 1000, metavar="MS",
+                        help="Milliseconds a micro-batch waits for more requests (default: 0, no added latency)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Records per streamed /render/batch chunk")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, max(1, args.max_batch), args.batch_delay / 1000, max(1, args.chunk_size)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,497 @@
+"""
+Bulk prompt output as one append-only data file plus an offset index.
+
+    python -m prompt_cli records.jsonl --store corpus.prompts
+    python -m prompt_store corpus.prompts get 12345
+    python -m prompt_store corpus.prompts slice 1000 1010
+
+`corpus.prompts` holds the UTF-8 prompts back to back. `corpus.prompts.idx`
+holds a fixed-size header, one 32-byte entry per record (data offset and
+length, ID offset and length) in write order, an open-addressing hash table
+from record ID to entry, and the IDs themselves. A reader maps both files
+and reads only the header when it opens them. Every later access touches a
+few pages: a lookup by ID hashes it and probes the table, and a slice by
+position reads consecutive entries. Opening costs the same for any corpus
+size.
+
+Writing an ID that is already in the store, or earlier in the same session,
+keeps its position and points its entry at the new text, which is appended
+to the data file. The bytes of the old text stay behind until `compact`
+rewrites the store. A new store is written beside the old one and both
+files are swapped in when the writer closes. The index records which data
+file it belongs to, so a reader never pairs it with the other store's data.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import time
+from array import array
+
+MAGIC = b"PROMPTIX"
+VERSION = 1
+# magic, version, record count, table slots, entries/table/ids offsets, ids length, data file inode
+_HEADER = struct.Struct("<8sQQQQQQQQ")
+HEADER_SIZE = 128
+# data offset, data length, id offset, id length
+ENTRY_SIZE = 32
+# Bytes buffered before each write to the data file
+WRITE_BUFFER = 4 << 20
+INDEX_SUFFIX = ".idx"
+# Times a reader reopens a store that was swapped while it opened it
+OPEN_ATTEMPTS = 5
+
+
+def id_hash(key):
+    """Hash of an encoded record ID; stable across processes, unlike `hash()`."""
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def table_slots(count):
+    """Power of two at least twice `count`, so probes stay short."""
+    slots = 8
+    while slots < 2 * count:
+        slots *= 2
+    return slots
+
+
+def _map(path):
+    """
+    Returns:
+        tuple: (read-only mapping of the file, or b"" when it is empty; the file's inode).
+    """
+    with open(path, "rb") as f:
+        inode = os.fstat(f.fileno()).st_ino
+        if not os.fstat(f.fileno()).st_size:
+            return b"", inode
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ), inode
+
+
+def _read_at(f, at, size):
+    """Read from a file that is being appended to, leaving its position at the end."""
+    f.seek(at)
+    data = f.read(size)
+    f.seek(0, os.SEEK_END)
+    return data
+
+
+class PromptStore:
+    """Read-only view of a store; lookups by ID and by position are O(1)."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Data file; the index is `path + ".idx"`
+        Raises:
+            ValueError: When the index is not a prompt store index.
+        """
+        self.path = path
+        # A writer swaps in the data file, then the index; retry if they were opened from different stores
+        for attempt in range(OPEN_ATTEMPTS):
+            self._index, _ = _map(path + INDEX_SUFFIX)
+            magic, version, count, slots, entries_at, table_at, ids_at, ids_length, data_inode = (
+                _HEADER.unpack_from(self._index)
+            )
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path + INDEX_SUFFIX} is not a prompt store index")
+            self._data, inode = _map(path)
+            if not data_inode or data_inode == inode:
+                break
+            for mapped in (self._index, self._data):
+                if isinstance(mapped, mmap.mmap):
+                    mapped.close()
+            time.sleep(0.01 * (attempt + 1))
+        else:
+            raise ValueError(f"{path} was replaced while it was being opened")
+        self._text = memoryview(self._data)
+        index = memoryview(self._index)
+        self._entries = index[entries_at:entries_at + count * ENTRY_SIZE].cast("Q")
+        self._table = index[table_at:table_at + slots * 8].cast("Q")
+        self._ids = index[ids_at:ids_at + ids_length]
+        self._count = count
+        self._mask = slots - 1
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Unmap the files. Views returned by `view` must not be used afterwards."""
+        for view in (self._entries, self._table, self._ids, self._text):
+            view.release()
+        for mapped in (self._index, self._data):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+
+    def position(self, record_id):
+        """
+        Returns:
+            int: Write position of `record_id`, or -1 when it is not stored.
+        """
+        return self._find(str(record_id).encode("utf-8"))
+
+    def _find(self, key):
+        slot = id_hash(key) & self._mask
+        table, entries = self._table, self._entries
+        while True:
+            stored = table[slot]
+            if not stored:
+                return -1
+            i = (stored - 1) * 4
+            offset, length = entries[i + 2], entries[i + 3]
+            if length == len(key) and self._ids[offset:offset + length] == key:
+                return stored - 1
+            slot = (slot + 1) & self._mask
+
+    def __contains__(self, record_id):
+        return self.position(record_id) >= 0
+
+    def view_at(self, position):
+        """The prompt at write position `position` as UTF-8 bytes, without copying."""
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        offset, length = self._entries[position * 4], self._entries[position * 4 + 1]
+        return self._text[offset:offset + length]
+
+    def view(self, record_id):
+        """
+        Returns:
+            memoryview: The prompt of `record_id` as UTF-8 bytes, without copying.
+        Raises:
+            KeyError: When the ID is not stored.
+        """
+        position = self.position(record_id)
+        if position < 0:
+            raise KeyError(record_id)
+        return self.view_at(position)
+
+    def get(self, record_id, default=None):
+        position = self.position(record_id)
+        return default if position < 0 else str(self.view_at(position), "utf-8")
+
+    def _key_at(self, position):
+        offset, length = self._entries[position * 4 + 2], self._entries[position * 4 + 3]
+        return self._ids[offset:offset + length]
+
+    def id_at(self, position):
+        if not 0 <= position < self._count:
+            raise IndexError(position)
+        offset, length = self._entries[position * 4 + 2], self._entries[position * 4 + 3]
+        return str(self._ids[offset:offset + length], "utf-8")
+
+    def __getitem__(self, key):
+        """
+        `store["42"]` looks a prompt up by ID, `store[7]` by write position, and
+        `store[100:200]` returns the prompts at those positions.
+        """
+        if isinstance(key, slice):
+            return [str(self.view_at(i), "utf-8") for i in range(*key.indices(self._count))]
+        if isinstance(key, int):
+            return str(self.view_at(key if key >= 0 else key + self._count), "utf-8")
+        position = self.position(key)
+        if position < 0:
+            raise KeyError(key)
+        return str(self.view_at(position), "utf-8")
+
+    def items(self, start=0, stop=None):
+        """Yield (id, prompt) in write order, for positions `start` to `stop`."""
+        for i in range(*slice(start, stop).indices(self._count)):
+            yield self.id_at(i), str(self.view_at(i), "utf-8")
+
+    def data_bytes(self):
+        """Size of the data file, including text replaced by later writes."""
+        return len(self._data)
+
+
+class PromptStoreWriter:
+    """
+    Append prompts to a store. Text is buffered and written in large blocks;
+    the index is rebuilt on `close` and replaces the old one atomically, so
+    readers see either the old or the new store, never a partial one. A new
+    store (no `append`) is written beside the old one and swapped in whole.
+    """
+
+    def __init__(self, path, append=False, buffer_size=WRITE_BUFFER):
+        """
+        Args:
+            path (str): Data file; the index is `path + ".idx"`
+            append (bool): Keep an existing store and add to it; otherwise start empty
+            buffer_size (int): Bytes of text buffered before each write
+        """
+        self.path = path
+        self.buffer_size = buffer_size
+        self._tmp = f"{path}{INDEX_SUFFIX}.{os.getpid()}.tmp"
+        self._base = PromptStore(path) if append and os.path.exists(path + INDEX_SUFFIX) else None
+        # Readers may have the old data file mapped, so it is only ever appended to or replaced
+        self._data_path = path if self._base else f"{path}.{os.getpid()}.tmp"
+        self._data = open(self._data_path, "ab" if self._base else "wb", buffering=0)
+        self._offset = self._data.seek(0, os.SEEK_END)
+        self._index = open(self._tmp, "w+b")
+        self._index.write(bytes(HEADER_SIZE))
+        self._ids = open(self._tmp + ".ids", "w+b")
+        self._hashes = array("Q")
+        # Open-addressing table of position + 1, kept at most half full; becomes the index's table
+        self._table = array("Q", bytes(8 * table_slots(0)))
+        self._count = 0
+        # Positions whose entries and IDs are written to the temporary files
+        self._flushed = 0
+        self._ids_length = 0
+        # Positions rewritten in this session -> (data offset, length)
+        self._replaced = {}
+        self._text = []
+        self._text_size = 0
+        self._entries = array("Q")
+        self._new_ids = []
+        if self._base:
+            self._copy_base()
+
+    def _copy_base(self):
+        base = self._base
+        self._index.write(base._entries)
+        self._ids.write(base._ids)
+        self._ids_length = len(base._ids)
+        self._flushed = len(base)
+        for position in range(len(base)):
+            key = base._key_at(position)
+            hashed = id_hash(key)
+            slot = self._slot(hashed, key)
+            if self._table[slot]:
+                # A store written before IDs were kept unique: its first position takes the last text
+                entries = base._entries
+                self._replaced[self._table[slot] - 1] = (entries[position * 4], entries[position * 4 + 1])
+            else:
+                self._table[slot] = position + 1
+            self._hashes.append(hashed)
+            self._count += 1
+            if 2 * self._count > len(self._table):
+                self._grow()
+
+    def _key_at(self, position):
+        if position >= self._flushed:
+            return self._new_ids[position - self._flushed]
+        if self._base and position < len(self._base):
+            return self._base._key_at(position)
+        at, length = struct.unpack("<QQ", _read_at(self._index, HEADER_SIZE + position * ENTRY_SIZE + 16, 16))
+        return _read_at(self._ids, at, length)
+
+    def _slot(self, hashed, key):
+        """The slot holding `key`, or the empty slot where it would go."""
+        table, hashes = self._table, self._hashes
+        mask = len(table) - 1
+        slot = hashed & mask
+        while table[slot]:
+            other = table[slot] - 1
+            if hashes[other] == hashed and self._key_at(other) == key:
+                return slot
+            slot = (slot + 1) & mask
+        return slot
+
+    def _grow(self):
+        """Rebuild the table four times larger, so each position is rehashed about a third of a time on average."""
+        table = array("Q", bytes(32 * len(self._table)))
+        mask = len(table) - 1
+        for position, hashed in enumerate(self._hashes):
+            slot = hashed & mask
+            while table[slot]:
+                slot = (slot + 1) & mask
+            table[slot] = position + 1
+        self._table = table
+
+    def add(self, record_id, prompt):
+        """Append one prompt under `record_id` (any value; stored as its str)."""
+        self.add_encoded(str(record_id).encode("utf-8"), prompt.encode("utf-8"))
+
+    def add_encoded(self, key, data):
+        """Like `add`, with the ID and prompt already encoded as UTF-8."""
+        offset = self._offset + self._text_size
+        self._text.append(data)
+        self._text_size += len(data)
+        hashed = id_hash(key)
+        table = self._table
+        slot = hashed & (len(table) - 1)
+        if table[slot]:
+            slot = self._slot(hashed, key)
+        if table[slot]:
+            # A stored ID, or one repeated in this session, keeps its position
+            self._replaced[self._table[slot] - 1] = (offset, len(data))
+        else:
+            self._count += 1
+            table[slot] = self._count
+            self._hashes.append(hashed)
+            self._entries.extend((offset, len(data), self._ids_length, len(key)))
+            self._new_ids.append(key)
+            self._ids_length += len(key)
+            if 2 * self._count > len(table):
+                self._grow()
+        if self._text_size >= self.buffer_size:
+            self.flush()
+
+    def add_many(self, pairs):
+        """Append (id, prompt) pairs."""
+        for record_id, prompt in pairs:
+            self.add(record_id, prompt)
+
+    def flush(self):
+        """Write buffered text and entries; the index stays unpublished until `close`."""
+        if self._text:
+            self._data.write(b"".join(self._text))
+            self._offset += self._text_size
+            self._text.clear()
+            self._text_size = 0
+        if self._entries:
+            self._index.write(self._entries)
+            self._ids.write(b"".join(self._new_ids))
+            self._entries = array("Q")
+            self._new_ids.clear()
+            self._flushed = self._count
+
+    def close(self):
+        """Write the rest of the text, then build and publish the index."""
+        self.flush()
+        data_inode = os.fstat(self._data.fileno()).st_ino
+        self._data.close()
+        if self._base:
+            self._base.close()
+        entries_at = HEADER_SIZE
+        slots = len(self._table)
+        table_at = entries_at + self._count * ENTRY_SIZE
+        ids_at = table_at + slots * 8
+        self._index.seek(table_at)
+        self._index.truncate()
+        self._index.write(self._table)
+        self._ids.seek(0)
+        shutil.copyfileobj(self._ids, self._index, 1 << 20)
+        self._ids.close()
+        os.remove(self._tmp + ".ids")
+        self._index.seek(0)
+        self._index.write(_HEADER.pack(
+            MAGIC, VERSION, self._count, slots, entries_at, table_at, ids_at, self._ids_length, data_inode
+        ))
+        self._index.flush()
+        if self._replaced:
+            self._patch_entries()
+        self._index.close()
+        if self._data_path != self.path:
+            os.replace(self._data_path, self.path)
+        os.replace(self._tmp, self.path + INDEX_SUFFIX)
+
+    def _patch_entries(self):
+        """Point the entries of rewritten positions at their new text."""
+        mapped = mmap.mmap(self._index.fileno(), 0)
+        try:
+            view = memoryview(mapped)
+            entries = view[HEADER_SIZE:HEADER_SIZE + self._count * ENTRY_SIZE].cast("Q")
+            for position, (offset, length) in self._replaced.items():
+                entries[position * 4] = offset
+                entries[position * 4 + 1] = length
+            entries.release()
+            view.release()
+            mapped.flush()
+        finally:
+            mapped.close()
+
+    def abort(self):
+        """
+        Drop the unpublished index. An appended data file keeps any text
+        already written; a new one is removed.
+        """
+        self._data.close()
+        if self._base:
+            self._base.close()
+        for f in (self._index, self._ids):
+            f.close()
+        paths = [self._tmp, self._tmp + ".ids"] + ([self._data_path] if self._data_path != self.path else [])
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def compact(path):
+    """
+    Rewrite a store without the text left behind by replaced records. The
+    new store is swapped in whole, so readers keep working; run it while
+    nothing else writes the store.
+    Returns:
+        int: Bytes reclaimed.
+    """
+    store = PromptStore(path)
+    try:
+        before = store.data_bytes()
+        writer = PromptStoreWriter(path)
+        try:
+            for i in range(len(store)):
+                writer.add_encoded(bytes(store._key_at(i)), bytes(store.view_at(i)))
+        except BaseException:
+            writer.abort()
+            raise
+    finally:
+        store.close()
+    writer.close()
+    return before - os.path.getsize(path)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m prompt_store",
+        description="Read prompts from a store written with `python -m prompt_cli --store`.",
+    )
+    parser.add_argument("store", help="Data file of the store")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("info", help="Print the record count and file sizes")
+    get = commands.add_parser("get", help="Print the prompts of these record IDs")
+    get.add_argument("ids", nargs="+")
+    part = commands.add_parser("slice", help="Write positions START to STOP as JSONL {id, prompt}")
+    part.add_argument("start", type=int)
+    part.add_argument("stop", type=int)
+    commands.add_parser("compact", help="Drop the text of replaced records")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "compact":
+        print(f"Reclaimed {compact(args.store):,} bytes", file=sys.stderr)
+        return 0
+    with PromptStore(args.store) as store:
+        if args.command == "info":
+            print(json.dumps({
+                "records": len(store),
+                "data_bytes": store.data_bytes(),
+                "index_bytes": os.path.getsize(args.store + INDEX_SUFFIX),
+            }))
+        elif args.command == "get":
+            missing = 0
+            for record_id in args.ids:
+                prompt = store.get(record_id)
+                if prompt is None:
+                    print(f"no record {record_id!r}", file=sys.stderr)
+                    missing += 1
+                else:
+                    sys.stdout.write(prompt + "\n")
+            return 1 if missing else 0
+        else:
+            for record_id, prompt in store.items(args.start, args.stop):
+                sys.stdout.write(json.dumps({"id": record_id, "prompt": prompt}, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
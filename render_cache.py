@@ -0,0 +1,128 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from utils import SLOT_KEYS, action_pairs, generate_prompt, generate_prompts
+
+DEFAULT_MAXSIZE = 4096
+
+
+def normalize_form(form_data, lang="en"):
+    """
+    Reduce a form record to the parts that affect the rendered prompt.
+    Args:
+        form_data (dict | models.FormRecord): Form record
+        lang (str): 'en' for English, 'zh' for Chinese
+    Returns:
+        list: [lang, field values...] with actions as [type, value] pairs.
+    """
+    form_data = form_data or {}
+    normalized = ["zh" if lang == "zh" else "en"]
+    for key in SLOT_KEYS:
+        value = form_data.get(key)
+        if key == "action" and isinstance(value, (list, tuple)):
+            value = [list(pair) for pair in action_pairs(value)]
+        normalized.append(value)
+    return normalized
+
+
+def form_key(form_data, lang="en"):
+    """
+    Canonical hash of (lang, form_data).
+    Args:
+        form_data (dict): Form record
+        lang (str): 'en' for English, 'zh' for Chinese
+    Returns:
+        str: Hex digest that is equal for records rendering the same prompt.
+    """
+    payload = json.dumps(normalize_form(form_data, lang), ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class RenderCache:
+    """Bounded LRU of rendered prompts keyed by `form_key`. Safe to share between threads."""
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key):
+        with self._lock:
+            prompt = self._entries.get(key)
+            if prompt is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+            return prompt
+
+    def _put(self, key, prompt):
+        with self._lock:
+            self._entries[key] = prompt
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def render(self, form_data, lang="en"):
+        """
+        Render one prompt, reusing the cached text when the form has not changed.
+        Args:
+            form_data (dict): Form record
+            lang (str): 'en' for English, 'zh' for Chinese
+        Returns:
+            str: The generated prompt string.
+        """
+        key = form_key(form_data, lang)
+        prompt = self._get(key)
+        if prompt is None:
+            prompt = generate_prompt(form_data, lang)
+            self._put(key, prompt)
+        return prompt
+
+    def render_many(self, records, lang="en"):
+        """
+        Render a batch, rendering each distinct record at most once.
+        Args:
+            records (list): Form records
+            lang (str): 'en' for English, 'zh' for Chinese
+        Returns:
+            list: One prompt per record, in input order.
+        """
+        keys = [form_key(r, lang) for r in records]
+        prompts = [self._get(k) for k in keys]
+        missing = {}
+        for i, (key, prompt) in enumerate(zip(keys, prompts)):
+            if prompt is None and key not in missing:
+                missing[key] = i
+        if missing:
+            rendered = generate_prompts([records[i] for i in missing.values()], lang)
+            fresh = dict(zip(missing, rendered))
+            for key, prompt in fresh.items():
+                self._put(key, prompt)
+            prompts = [p if p is not None else fresh[k] for k, p in zip(keys, prompts)]
+        return prompts
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, hit_rate, size and maxsize.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,248 @@
+"""
+Per-session memory accounting, with large text moved to disk.
+
+A form value longer than PROMPT_SPILL_BYTES (default 64 KiB) is written to a
+content-addressed file in PROMPT_BLOB_DIR and replaced by a `BlobHandle`. The
+builder only resolves handles while it renders and while the user is
+editing the field. Each full rerun records the session's resident bytes in a
+process-wide registry. Sessions idle for PROMPT_IDLE_SECONDS (default 600),
+and then the least recently active ones while the process total, the
+section cache included, is over PROMPT_MEMORY_CAP (default 256 MiB), have
+every sizeable value spilled and their widget state dropped. A session is
+only changed between its runs. Spilling loses nothing: a session that comes
+back reads its values from disk.
+"""
+import hashlib
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import instrumentation
+from utils import section_cache_info
+
+SPILL_BYTES = int(os.environ.get("PROMPT_SPILL_BYTES", 64 << 10))
+# Values from this size are spilled when a whole session is evicted
+EVICT_SPILL_BYTES = 1 << 10
+PROCESS_CAP = int(os.environ.get("PROMPT_MEMORY_CAP", 256 << 20))
+IDLE_SECONDS = float(os.environ.get("PROMPT_IDLE_SECONDS", 600))
+BLOB_DIR = os.environ.get("PROMPT_BLOB_DIR") or os.path.join(tempfile.gettempdir(), "prompt_blobs")
+# Blob files not read or written for this long are deleted
+BLOB_TTL = 7 * 24 * 3600
+# Characters of a spilled value kept in memory for display
+HEAD_CHARS = 200
+
+
+class BlobHandle:
+    """Stands in for a spilled text value."""
+    __slots__ = ("digest", "length", "head")
+
+    def __init__(self, digest, length, head):
+        self.digest = digest
+        self.length = length
+        self.head = head
+
+    def __repr__(self):
+        return f"BlobHandle({self.digest[:12]}, {self.length} chars)"
+
+
+class BlobStore:
+    """Text blobs in files named by their hash, so equal values are stored once."""
+
+    def __init__(self, directory=BLOB_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, digest):
+        return os.path.join(self.directory, f"{digest}.txt")
+
+    def put(self, text):
+        """
+        Store `text` on disk.
+        Returns:
+            BlobHandle: Handle to read it back with `get`.
+        """
+        data = text.encode("utf-8")
+        digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+        path = self._path(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            instrumentation.count("blob_bytes_written", len(data))
+        return BlobHandle(digest, len(text), text[:HEAD_CHARS])
+
+    def get(self, handle):
+        """
+        Read a spilled value back.
+        Returns:
+            str: The text; its first characters only if the file was removed.
+        """
+        path = self._path(handle.digest)
+        try:
+            with open(path, "rb") as f:
+                text = f.read().decode("utf-8")
+            os.utime(path)
+            return text
+        except FileNotFoundError:
+            return handle.head
+
+    def collect(self, ttl=BLOB_TTL):
+        """Delete blob files unused for `ttl` seconds. Returns how many were deleted."""
+        cutoff = time.time() - ttl
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".txt") and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        return removed
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def store():
+    """The process's blob store, created on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = BlobStore()
+            _store.collect()
+        return _store
+
+
+def spill(value, threshold=SPILL_BYTES):
+    """Replace a string of at least `threshold` characters by a handle; return anything else as is."""
+    if isinstance(value, str) and len(value) >= threshold:
+        instrumentation.count("blob_spills")
+        return store().put(value)
+    return value
+
+
+def resolve(value):
+    """Inverse of `spill`."""
+    return store().get(value) if isinstance(value, BlobHandle) else value
+
+
+def spill_form(form_data, threshold=SPILL_BYTES):
+    """Spill the large text fields of a form record, in place."""
+    for key, value in form_data.items():
+        if isinstance(value, str) and len(value) >= threshold:
+            form_data[key] = spill(value, threshold)
+
+
+def resolved_form(form_data):
+    """
+    A form record with spilled values read back, for rendering or saving.
+    Returns:
+        dict: `form_data` itself when nothing in it is spilled, else a copy.
+    """
+    if not any(isinstance(v, BlobHandle) for v in form_data.values()):
+        return form_data
+    return {key: resolve(value) for key, value in form_data.items()}
+
+
+def resident_bytes(*containers):
+    """
+    Bytes held by the strings in `containers` (dicts, lists and tuples,
+    nested), each distinct string object counted once.
+    """
+    seen = set()
+    total = 0
+    stack = list(containers)
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            if id(item) not in seen:
+                seen.add(id(item))
+                total += sys.getsizeof(item)
+        elif isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            stack.extend(item)
+    return total
+
+
+class SessionRegistry:
+    """Resident bytes and last activity of each session in this process."""
+
+    def __init__(self, cap=PROCESS_CAP, idle_seconds=IDLE_SECONDS):
+        self.cap = cap
+        self.idle_seconds = idle_seconds
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def update(self, session_id, resident, release):
+        """
+        Record a session's footprint after one of its reruns.
+        Args:
+            session_id (str): Session token
+            resident (int): Bytes the session holds, see `resident_bytes`
+            release (callable): Moves the session's text out of memory when it
+                is evicted; returns the bytes it still holds afterwards, or None
+                when the session is in the middle of a run and was left as it is
+        """
+        with self._lock:
+            self._sessions[session_id] = (resident, time.monotonic(), release)
+
+    def total(self):
+        """Bytes held by every session plus the process-wide section cache."""
+        with self._lock:
+            return sum(resident for resident, _, _ in self._sessions.values()) + section_cache_info()["bytes"]
+
+    def usage(self):
+        """
+        Returns:
+            dict: sessions, total_bytes (the section cache included), section_cache_bytes and cap_bytes.
+        """
+        cache_bytes = section_cache_info()["bytes"]
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "total_bytes": sum(resident for resident, _, _ in self._sessions.values()) + cache_bytes,
+                "section_cache_bytes": cache_bytes,
+                "cap_bytes": self.cap,
+            }
+
+    def enforce(self, current=None):
+        """
+        Evict idle sessions. Then, while the process is over its cap, evict the
+        least recently active others. `current` is never evicted. The section
+        cache counts towards the cap but is bounded on its own, so only
+        sessions are evicted. Evicting calls the session's `release`, which
+        spills every value of EVICT_SPILL_BYTES or more and drops the widget
+        state holding them. Only the bytes it freed leave the total; what
+        remains stays counted, and the session is not evicted again until its
+        next rerun. A session that is running is skipped.
+        Returns:
+            list: IDs of the evicted sessions.
+        """
+        now = time.monotonic()
+        cache_bytes = section_cache_info()["bytes"]
+        with self._lock:
+            total = sum(resident for resident, _, _ in self._sessions.values()) + cache_bytes
+            evicted = []
+            for session_id, (resident, seen, release) in sorted(self._sessions.items(), key=lambda s: s[1][1]):
+                if session_id == current or release is None:
+                    continue
+                if now - seen < self.idle_seconds and total <= self.cap:
+                    break
+                remaining = release()
+                if remaining is None:
+                    continue
+                total -= resident - remaining
+                evicted.append(session_id)
+                if remaining:
+                    self._sessions[session_id] = (remaining, seen, None)
+                else:
+                    del self._sessions[session_id]
+        instrumentation.count("sessions_evicted", len(evicted))
+        return evicted
+
+
+REGISTRY = SessionRegistry()
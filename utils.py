@@ -1,104 +1,612 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from itertools import repeat
+from string import Formatter
+
+from instrumentation import traced
+
+# Prompt sections per language, in display order (matches SECTIONS_I18N in app.py).
+# `{name}` marks a slot that is filled at render time; everything else is
+# literal text. Templates are compiled once at import.
+SECTION_KEYS = ("role", "task", "context", "action", "output")
+
+SECTION_SOURCES = {
+    "en": {
+        "role": "\n".join([
+            "# <Role>",
+            "- You are an expert in {domain} with specialization in {specialization}.",
+        ]),
+        "task": "\n".join([
+            "# <Task>",
+            "- Your task is to {specificGoal}.",
+        ]),
+        "context": "\n".join([
+            "# <Context>",
+            "- Here is the context you need: ",
+            "  - {details}",
+            "  - {constraints}",
+        ]),
+        "action": "\n".join([
+            "# <ReAct Framework: Reasoning & Action>",
+            "## Reasoning",
+            "- Let's think step by step.",
+            "## Action",
+            "{action}",
+            "## Observation",
+            "- Use the action results to produce the answer.",
+        ]),
+        "output": "\n".join([
+            "# <Output Format>",
+            "- Return a {format} file{structure}",
+            "- Don't {unwantedResult}",
+        ]),
+    },
+    "zh": {
+        "role": "\n".join([
+            "# <角色>",
+            "- 你是 {domain} 的專家，專精於 {specialization}。",
+        ]),
+        "task": "\n".join([
+            "# <任務>",
+            "- 你的任務是 {specificGoal}。",
+        ]),
+        "context": "\n".join([
+            "# <情境>",
+            "- 你需要的背景資訊：",
+            "  - {details}",
+            "  - {constraints}",
+        ]),
+        "action": "\n".join([
+            "# <先推理再行動>",
+            "## 推理",
+            "- 讓我們一步一步思考。",
+            "## 行動",
+            "{action}",
+            "## 觀察",
+            "- 依據行動的結果產出答案。",
+        ]),
+        "output": "\n".join([
+            "# <輸出格式>",
+            "- 請以 {format} 格式{structure}",
+            "- 請避免 {unwantedResult}。",
+        ]),
+    },
+}
+
+# Sections are separated by one blank line
+SECTION_SEPARATOR = "\n\n"
+
+TEMPLATE_SOURCES = {
+    lang: SECTION_SEPARATOR.join(sections[key] for key in SECTION_KEYS)
+    for lang, sections in SECTION_SOURCES.items()
+}
+
+# Text used in place of an empty field
+PLACEHOLDERS = {
+    "en": {
+        "domain": "{domain}",
+        "specialization": "{specialization}",
+        "specificGoal": "{specific goal}",
+        "details": "{details}",
+        "constraints": "{constraints}",
+        "format": "{format}",
+        "unwantedResult": "{unwanted result}",
+        "action": "{action}",
+    },
+    "zh": {
+        "domain": "{領域}",
+        "specialization": "{專精項目}",
+        "specificGoal": "{具體目標}",
+        "details": "{背景細節}",
+        "constraints": "{限制條件}",
+        "format": "{輸出格式}",
+        "unwantedResult": "{避免結果}",
+        "action": "{行動}",
+    },
+}
+
+# Action type names as they appear in the prompt
+ACTION_NAMES = {
+    "en": {},
+    "zh": {"Search": "搜尋", "Lookup": "查找", "Browse": "瀏覽"},
+}
+
+# Ending of the output-format line, with and without a user-defined structure
+STRUCTURE_CLAUSES = {
+    "en": (": follow this structure: {}", " (any structure is fine)."),
+    "zh": ("，並依照下列結構：{}", "，結構可自行決定。"),
+}
+
+DEFAULT_ACTION_TYPE = "Search"
+
+
+def compile_template(source, lang):
+    """
+    Split a template into literal chunks and slot references.
+    Args:
+        source (str): Template text with `{slot}` markers
+        lang (str): Language of the template, used to look up placeholders
+    Returns:
+        tuple: (chunks, fields, computed, fill) where chunks is a list of literal strings
+            with None at every slot position, fields holds (position, key, placeholder)
+            for plain form fields and computed holds (position, key, renderer) for
+            slots built from a field by a function in `SLOT_RENDERERS`. fill(form_data, lang)
+            renders the template, see `fill_function`.
+    """
+    placeholders = PLACEHOLDERS[lang]
+    chunks = []
+    fields = []
+    computed = []
+    for literal, name, _, _ in Formatter().parse(source):
+        if literal:
+            chunks.append(literal)
+        if name is None:
+            continue
+        if name in SLOT_RENDERERS:
+            computed.append((len(chunks), name, SLOT_RENDERERS[name]))
+        else:
+            fields.append((len(chunks), name, placeholders[name]))
+        chunks.append(None)
+    fields, computed = tuple(fields), tuple(computed)
+    return chunks, fields, computed, fill_function(chunks, fields, computed)
+
+
+def fill_function(chunks, fields, computed):
+    """
+    Turn the chunks and slots of a template into one function that renders it with a
+    single f-string: literals and placeholders are bound as globals, each
+    field is one `get(key) or placeholder` and each computed slot one
+    renderer call. Non-string values are formatted like `str()` would.
+    Returns:
+        callable: fill(form_data, lang) -> str
+    """
+    namespace = {}
+    parts = []
+    slots = {pos: (key, placeholder) for pos, key, placeholder in fields}
+    renderers = {pos: key for pos, key, _ in computed}
+    for pos, chunk in enumerate(chunks):
+        name = f"_{pos}"
+        if chunk is not None:
+            namespace[name] = chunk
+            parts.append(f"{{{name}}}")
+        elif pos in slots:
+            key, namespace[name] = slots[pos]
+            parts.append(f"{{get({key!r}) or {name}}}")
+        else:
+            namespace[name] = SLOT_RENDERERS[renderers[pos]]
+            parts.append(f"{{{name}(get({renderers[pos]!r}), lang)}}")
+    source = f'def fill(form_data, lang):\n    get = form_data.get\n    return f"{"".join(parts)}"\n'
+    exec(source, namespace)
+    return namespace["fill"]
+
+
+# models.Action, bound on the first tuple seen: models imports this module, so it cannot be imported at the top
+_Action = None
+
+
+def is_action_tuple(actions):
+    """True for the `models.Action` tuple of a FormRecord, as opposed to any other tuple."""
+    global _Action
+    if not isinstance(actions, tuple):
+        return False
+    if _Action is None:
+        from models import Action
+        _Action = Action
+    for a in actions:
+        if not isinstance(a, _Action):
+            return False
+    return True
+
+
+def render_action_lines(actions, lang="en"):
+    """
+    Render the action list as prompt lines.
+    Args:
+        actions (list | tuple | str): List or tuple of {"type", "value"} dicts, tuple of `models.Action`,
+            or a newline-separated string of search queries
+        lang (str): 'en' for English, 'zh' for Chinese
+    Returns:
+        str: One `- [Type("value")]` line per non-empty action, joined by newlines.
+    """
+    names = ACTION_NAMES[lang]
+    default_name = names.get(DEFAULT_ACTION_TYPE, DEFAULT_ACTION_TYPE)
+    action_lines = []
+    if isinstance(actions, tuple) and is_action_tuple(actions):
+        # Actions of a models.FormRecord: already stripped, non-empty and typed
+        action_lines = [f"- [{names.get(a.type, a.type)}(\"{a.value}\")]" for a in actions]
+    elif isinstance(actions, (list, tuple)):
+        for a in actions:
+            if not isinstance(a, dict):
+                continue
+            val = a.get("value", "").strip()
+            if val:
+                action_type = a.get("type", DEFAULT_ACTION_TYPE)
+                action_lines.append(f"- [{names.get(action_type, action_type)}(\"{val}\")]")
+    elif isinstance(actions, str):
+        values = [v for v in map(str.strip, actions.split("\n")) if v]
+        if values:
+            # Every line has the default type, so one join puts the values between their brackets
+            return f"- [{default_name}(\"" + f"\")]\n- [{default_name}(\"".join(values) + "\")]"
+    if not action_lines:
+        return f"- [{default_name}(\"{PLACEHOLDERS[lang]['action']}\")]"
+    return "\n".join(action_lines)
+
+
+def render_structure_clause(structure, lang="en"):
+    """
+    Render the end of the output-format line.
+    Args:
+        structure (str): The requested output structure, may be empty
+        lang (str): 'en' for English, 'zh' for Chinese
+    Returns:
+        str: The clause asking for the given structure, or leaving it open.
+    """
+    with_structure, without_structure = STRUCTURE_CLAUSES[lang]
+    return with_structure.format(structure) if structure else without_structure
+
+
+# Slots that are derived from the record rather than copied from one field
+SLOT_RENDERERS = {
+    "action": render_action_lines,
+    "structure": render_structure_clause,
+}
+
+TEMPLATES = {lang: compile_template(source, lang) for lang, source in TEMPLATE_SOURCES.items()}
+SECTION_TEMPLATES = {
+    lang: {key: compile_template(source, lang) for key, source in sections.items()}
+    for lang, sections in SECTION_SOURCES.items()
+}
+
+
+def split_template(template):
+    """
+    Pair each literal chunk of a compiled template with the slot that follows it.
+    Args:
+        template (tuple): Result of `compile_template`
+    Returns:
+        tuple: (literal chunks, slot names) of equal length; the last slot name is None.
+    """
+    chunks, fields, computed, _ = template
+    names = {pos: key for pos, key, *_ in fields + computed}
+    literals = [""]
+    slots = []
+    for pos, chunk in enumerate(chunks):
+        if chunk is None:
+            slots.append(names[pos])
+            literals.append("")
+        else:
+            literals[-1] += chunk
+    slots.append(None)
+    return tuple(literals), tuple(slots)
+
+
+BATCH_CHUNKS = {lang: split_template(template) for lang, template in TEMPLATES.items()}
+SLOT_KEYS = tuple(name for name in BATCH_CHUNKS["en"][1] if name is not None)
+# Form fields each section is rendered from
+SECTION_INPUTS = {
+    key: tuple(name for name in split_template(template)[1] if name is not None)
+    for key, template in SECTION_TEMPLATES["en"].items()
+}
+
+
+def render_template(template, form_data, lang="en"):
+    """
+    Fill a compiled template from one form record.
+    Args:
+        template (tuple): Result of `compile_template`
+        form_data (dict): Form record
+        lang (str): Language of the template
+    Returns:
+        str: The rendered text.
+    """
+    return template[3](form_data, lang)
+
+
+@traced("generate_prompt")
 def generate_prompt(form_data, lang="en"):
     """
     Generate the structured AI prompt based on input fields.
     Args:
-        form_data (dict): Dictionary with keys: domain, specialization, specificGoal, action, details, constraints, format, structure, unwantedResult
+        form_data (dict | models.FormRecord): Dictionary with keys: domain, specialization, specificGoal, action, details, constraints, format, structure, unwantedResult
         lang (str): 'en' for English, 'zh' for Chinese
     Returns:
         str: The generated prompt string.
     """
-    if lang == "zh":
-        # 行動區塊處理
-        actions = form_data.get('action')
-        zh_type_map = {
-            "Search": "搜尋",
-            "Lookup": "查找",
-            "Browse": "瀏覽"
-        }
-        # Build Chinese prompt line-by-line to avoid indentation issues
-        lines = []
-        lines.append("# <角色>")
-        lines.append(f"- 你是 {form_data.get('domain') or '{領域}'} 的專家，專精於 {form_data.get('specialization') or '{專精項目}'}。")
-        lines.append("")
-        lines.append("# <任務>")
-        lines.append(f"- 你的任務是 {form_data.get('specificGoal') or '{具體目標}'}。")
-        lines.append("")
-        lines.append("# <情境>")
-        lines.append("- 你需要的背景資訊：")
-        lines.append(f"  - {form_data.get('details') or '{背景細節}'}")
-        lines.append(f"  - {form_data.get('constraints') or '{限制條件}'}")
-        lines.append("")
-        lines.append("# <先推理再行動>")
-        lines.append("## 推理")
-        lines.append("- 讓我們一步一步思考。")
-        lines.append("## 行動")
-        # actions
-        action_lines = []
-        if isinstance(actions, list):
-            for a in actions or []:
-                val = (a or {}).get("value", "").strip()
-                if val:
-                    action_lines.append(f"- [{zh_type_map.get((a or {}).get('type'), (a or {}).get('type'))}(\"{val}\")]")
-        elif isinstance(actions, str):
-            for v in actions.split("\n"):
-                v = v.strip()
-                if v:
-                    action_lines.append(f"- [搜尋(\"{v}\")]")
-        if not action_lines:
-            action_lines = ["- [搜尋(\"{行動}\")]"]
-        lines.extend(action_lines)
-        lines.append("## 觀察")
-        lines.append("- 依據行動的結果產出答案。")
-        lines.append("")
-        lines.append("# <輸出格式>")
-        if form_data.get('structure'):
-            lines.append(f"- 請以 {form_data.get('format') or '{輸出格式}'} 格式，並依照下列結構：{form_data.get('structure')}")
-        else:
-            lines.append(f"- 請以 {form_data.get('format') or '{輸出格式}'} 格式，結構可自行決定。")
-        lines.append(f"- 請避免 {form_data.get('unwantedResult') or '{避免結果}'}。")
-        prompt = "\n".join(lines)
+    if lang != "zh":
+        lang = "en"
+    return render_template(TEMPLATES[lang], form_data, lang)
+
+
+def action_pairs(actions):
+    """
+    Reduce an action list to hashable (type, value) pairs.
+    Args:
+        actions (list | tuple): {"type", "value"} dicts, or the `models.Action` tuple of a FormRecord
+    Returns:
+        tuple: (type, value) pairs with types as plain strings.
+    """
+    if is_action_tuple(actions):
+        return tuple((a.type.value, a.value) for a in actions)
+    return tuple([
+        (a.get("type", DEFAULT_ACTION_TYPE), a.get("value", "")) if isinstance(a, dict) else (DEFAULT_ACTION_TYPE, "")
+        for a in actions
+    ])
+
+
+def section_inputs(form_data, key):
+    """
+    Collect the inputs of one section in a hashable form.
+    Args:
+        form_data (dict): Form record
+        key (str): Section key, one of SECTION_KEYS
+    Returns:
+        tuple: The section's field values; an action list becomes a tuple of (type, value) pairs.
+            Other values are kept as they are, so a list in a plain field leaves the tuple unhashable.
+    """
+    values = []
+    for name in SECTION_INPUTS[key]:
+        value = form_data.get(name)
+        if name == "action" and isinstance(value, (list, tuple)):
+            value = action_pairs(value)
+        values.append(value)
+    return tuple(values)
+
+
+# Inputs longer than this (pasted documents) bypass the section cache, so it never pins them in memory
+SECTION_CACHE_MAX_INPUT = 64 << 10
+# Bytes of text the section cache may hold, inputs and rendered sections together
+SECTION_CACHE_BYTES = int(os.environ.get("PROMPT_SECTION_CACHE_BYTES", 16 << 20))
+
+
+class SectionCache:
+    """LRU of rendered sections bounded by the bytes of text it holds. Safe to share between threads."""
+
+    def __init__(self, max_bytes=SECTION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, text):
+        # The key's strings stay alive as long as the entry, so they count too
+        size = sys.getsizeof(text)
+        for value in key[2]:
+            if isinstance(value, str):
+                size += sys.getsizeof(value)
+            elif isinstance(value, tuple):
+                size += sum(sys.getsizeof(s) for pair in value for s in pair if isinstance(s, str))
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (text, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes and self._entries:
+                self.bytes -= self._entries.popitem(last=False)[1][1]
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, size (entries) and bytes.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries), "bytes": self.bytes}
+
+
+_section_cache = SectionCache()
+
+
+def _render_section(lang, key, inputs):
+    form_data = dict(zip(SECTION_INPUTS[key], inputs))
+    if isinstance(form_data.get("action"), tuple):
+        form_data["action"] = [{"type": t, "value": v} for t, v in form_data["action"]]
+    return render_template(SECTION_TEMPLATES[lang][key], form_data, lang)
+
+
+def render_section(form_data, key, lang="en"):
+    """
+    Render one prompt section, reusing the cached text while its inputs are unchanged.
+    Args:
+        form_data (dict): Form record
+        key (str): Section key, one of SECTION_KEYS
+        lang (str): 'en' for English, 'zh' for Chinese
+    Returns:
+        str: The section text.
+    """
+    if lang != "zh":
+        lang = "en"
+    inputs = section_inputs(form_data, key)
+    if any(isinstance(v, str) and len(v) > SECTION_CACHE_MAX_INPUT for v in inputs):
+        return _render_section(lang, key, inputs)
+    cache_key = (lang, key, inputs)
+    try:
+        text = _section_cache.get(cache_key)
+    except TypeError:
+        # A list or dict in a plain field cannot key the cache
+        return _render_section(lang, key, inputs)
+    if text is None:
+        text = _render_section(lang, key, inputs)
+        _section_cache.put(cache_key, text)
+    return text
+
+
+@traced("render_sections")
+def render_sections(form_data, lang="en"):
+    """
+    Render every prompt section; joined by SECTION_SEPARATOR they equal `generate_prompt`.
+    Args:
+        form_data (dict): Form record
+        lang (str): 'en' for English, 'zh' for Chinese
+    Returns:
+        tuple: One string per entry in SECTION_KEYS.
+    """
+    return tuple(render_section(form_data, key, lang) for key in SECTION_KEYS)
+
+
+def section_cache_info():
+    """
+    Statistics of the section cache, shared by every caller in the process.
+    Returns:
+        dict: hits, misses, size (entries) and bytes held.
+    """
+    return _section_cache.stats()
+
+
+def to_columns(records, keys=None):
+    """
+    Turn a batch of form records into one list per field.
+    Args:
+        records: Iterable of form dicts or `models.FormRecord`s, a dict of lists, a pandas DataFrame or a pyarrow Table
+        keys (iterable): Fields to extract from dict records; defaults to every template slot
+    Returns:
+        tuple: (columns, count) where columns maps field key -> list of values.
+    """
+    if hasattr(records, "column_names") and hasattr(records, "to_pydict"):
+        # pyarrow.Table / RecordBatch
+        columns = records.to_pydict()
+    elif hasattr(records, "columns") and hasattr(records, "to_dict"):
+        # pandas.DataFrame; NaN is truthy, so blank out missing cells first
+        columns = {c: records[c].astype(object).where(records[c].notna(), None).tolist() for c in records.columns}
+    elif isinstance(records, dict):
+        columns = {c: list(v) for c, v in records.items()}
     else:
-        actions = form_data.get('action')
-        # Build English prompt line-by-line to avoid indentation issues
-        lines = []
-        lines.append("# <Role>")
-        lines.append(f"- You are an expert in {form_data.get('domain') or '{domain}'} with specialization in {form_data.get('specialization') or '{specialization}'}.")
-        lines.append("")
-        lines.append("# <Task>")
-        lines.append(f"- Your task is to {form_data.get('specificGoal') or '{specific goal}' }.")
-        lines.append("")
-        lines.append("# <Context>")
-        lines.append("- Here is the context you need: ")
-        lines.append(f"  - {form_data.get('details') or '{details}'}")
-        lines.append(f"  - {form_data.get('constraints') or '{constraints}'}")
-        lines.append("")
-        lines.append("# <ReAct Framework: Reasoning & Action>")
-        lines.append("## Reasoning")
-        lines.append("- Let's think step by step.")
-        lines.append("## Action")
-        # actions
-        action_lines = []
-        if isinstance(actions, list):
-            for a in actions or []:
-                val = (a or {}).get("value", "").strip()
-                if val:
-                    action_lines.append(f"- [{(a or {}).get('type', 'Search')}(\"{val}\")]")
-        elif isinstance(actions, str):
-            for v in actions.split("\n"):
-                v = v.strip()
-                if v:
-                    action_lines.append(f"- [Search(\"{v}\")]")
-        if not action_lines:
-            action_lines = ["- [Search(\"{action}\")]"]
-        lines.extend(action_lines)
-        lines.append("## Observation")
-        lines.append("- Use the action results to produce the answer.")
-        lines.append("")
-        lines.append("# <Output Format>")
-        if form_data.get('structure'):
-            lines.append(f"- Return a {form_data.get('format') or '{format}'} file: follow this structure: {form_data.get('structure')}")
+        records = [r or {} for r in records]
+        return {k: [r.get(k) for r in records] for k in keys or SLOT_KEYS}, len(records)
+    count = len(next(iter(columns.values()))) if columns else 0
+    return columns, count
+
+
+# Action lists stop being keyed when most of the first this many are distinct: keying one costs about as much as rendering it
+MEMO_SAMPLE = 512
+
+
+def fill_column(name, column, count, lang="en"):
+    """
+    Resolve one slot for a whole column of values.
+    Args:
+        name (str): Slot name
+        column (list): Field values, or None if the field is absent
+        count (int): Number of records
+        lang (str): 'en' for English, 'zh' for Chinese
+    Returns:
+        list: Text to insert for each record.
+    """
+    if name in SLOT_RENDERERS:
+        renderer = SLOT_RENDERERS[name]
+        if column is None:
+            return [renderer(None, lang)] * count
+        # Exports repeat the same actions a lot; render each distinct string or action list once
+        keyed = name == "action"
+        lists = 0
+        rendered = {}
+        filled = []
+        append = filled.append
+        for v in column:
+            if isinstance(v, str):
+                key = v
+            elif keyed and isinstance(v, (list, tuple)):
+                key = action_pairs(v)
+                lists += 1
+                if lists == MEMO_SAMPLE and len(rendered) > MEMO_SAMPLE // 2:
+                    keyed = False
+            else:
+                append(renderer(v, lang))
+                continue
+            text = rendered.get(key)
+            if text is None:
+                text = rendered[key] = renderer(v, lang)
+            append(text)
+        return filled
+    placeholder = PLACEHOLDERS[lang][name]
+    if column is None:
+        return [placeholder] * count
+    # Non-string values are left for `render_columns` to str()
+    return [v or placeholder for v in column]
+
+
+def render_columns(columns, count, lang="en"):
+    """
+    Render prompts for columnar input, filling every slot a whole column at a time.
+    Slots that hold the same text for every record are merged into the
+    surrounding literals, so each record only pays for the slots that vary.
+    Args:
+        columns (dict): Field key -> list of values, see `to_columns`
+        count (int): Number of records
+        lang (str): 'en' for English, 'zh' for Chinese
+    Returns:
+        list: One prompt string per record.
+    """
+    if lang != "zh":
+        lang = "en"
+    if not count:
+        return []
+    chunks, names = BATCH_CHUNKS[lang]
+    # Alternate literal and per-record columns, merging constant slots into the literals
+    streams = []
+    literal = ""
+    for chunk, name in zip(chunks, names):
+        literal += chunk
+        if name is None:
+            continue
+        filled = fill_column(name, columns.get(name), count, lang)
+        first = filled[0]
+        # A varying column rarely ends on its first value, which spares the full scan
+        if filled[-1] == first and filled.count(first) == count:
+            literal += str(first)
         else:
-            lines.append(f"- Return a {form_data.get('format') or '{format}'} file (any structure is fine).")
-        lines.append(f"- Don't {form_data.get('unwantedResult') or '{unwanted result}'}")
-        prompt = "\n".join(lines)
-    return prompt
+            streams.append(repeat(literal))
+            streams.append(filled)
+            literal = ""
+    if not streams:
+        return [literal] * count
+    streams.append(repeat(literal))
+    join = "".join
+    try:
+        return [join(row) for row in zip(*streams)]
+    except TypeError:
+        # A field held a non-string value; format it the way render_template does
+        return [join(map(str, row)) for row in zip(*streams)]
+
+
+def generate_prompts(records, lang="en", stats=None):
+    """
+    Generate prompts for many records in one pass.
+    Args:
+        records: Iterable of form dicts or `models.FormRecord`s, a dict of lists, a pandas DataFrame or a pyarrow Table
+        lang (str): 'en' for English, 'zh' for Chinese
+        stats (dict): Optional; filled with records, seconds and records_per_sec
+    Returns:
+        list: The generated prompt strings, in input order.
+    """
+    start = time.perf_counter()
+    if lang != "zh":
+        lang = "en"
+    if isinstance(records, list) and records and not isinstance((records[0] or {}).get("action"), str):
+        # Row records with action lists share little across rows; the compiled template renders each in one call
+        fill = TEMPLATES[lang][3]
+        prompts = [fill(r or {}, lang) for r in records]
+        count = len(prompts)
+    else:
+        columns, count = to_columns(records)
+        prompts = render_columns(columns, count, lang)
+    if stats is not None:
+        elapsed = time.perf_counter() - start
+        stats["records"] = count
+        stats["seconds"] = elapsed
+        stats["records_per_sec"] = count / elapsed if elapsed else float("inf")
+    return prompts
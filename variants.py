@@ -0,0 +1,202 @@
+"""
+Lazy prompt-variant sweeps for A/B evaluation.
+
+    python -m variants sweep.json --lang en zh -o variants.jsonl
+    python -m variants sweep.json --shard 3/8 --sample 10000
+
+A sweep file holds per-field candidate lists and the fixed fields:
+
+    {"candidates": {"domain": ["finance", "biology"], "format": ["JSON", "markdown"],
+                    "action": [[{"type": "Search", "value": "news"}], "step one\\nstep two"]},
+     "base": {"specificGoal": "summarize the week"}}
+
+Every combination is rendered in turn, and memory stays the same for any
+sweep size. Combinations are numbered like an odometer, with the last
+field changing fastest. A section whose fields did not change since the
+previous combination is reused instead of rendered again.
+"""
+import argparse
+import json
+import random
+import sys
+from math import prod
+
+from utils import SECTION_INPUTS, SECTION_KEYS, SECTION_SEPARATOR, SECTION_TEMPLATES, SLOT_KEYS, render_template
+
+
+def selection_sample(start, stop, count, rng):
+    """
+    Yield `count` distinct indices from range(start, stop), in increasing order,
+    without holding them in memory (Knuth's selection sampling).
+    """
+    remaining = min(count, stop - start)
+    for i in range(start, stop):
+        if remaining <= 0:
+            return
+        if rng.random() * (stop - i) < remaining:
+            yield i
+            remaining -= 1
+
+
+class VariantSweep:
+    """Every combination of per-field candidate values, on top of fixed `base` fields."""
+
+    def __init__(self, candidates, base=None):
+        """
+        Args:
+            candidates (dict): Field key -> list of candidate values; fields listed first change slowest
+            base (dict): Values of the fields that do not vary
+        Raises:
+            ValueError: For a field that is not a template slot.
+        """
+        unknown = sorted(set(candidates) - set(SLOT_KEYS))
+        if unknown:
+            raise ValueError(f"not a prompt field: {', '.join(unknown)}")
+        self.fields = tuple(candidates)
+        self.values = tuple(list(candidates[field]) for field in self.fields)
+        self.base = dict(base or {})
+        self.size = prod(len(values) for values in self.values)
+
+    def digits(self, index):
+        """The candidate position of every field for combination `index`."""
+        digits = []
+        for values in reversed(self.values):
+            index, digit = divmod(index, len(values))
+            digits.append(digit)
+        return digits[::-1]
+
+    def form_at(self, index):
+        """
+        Returns:
+            dict: The form record of combination `index`.
+        """
+        form = dict(self.base)
+        for field, values, digit in zip(self.fields, self.values, self.digits(index)):
+            form[field] = values[digit]
+        return form
+
+    def indices(self, shard=None, sample=None, seed=0):
+        """
+        Combination numbers to enumerate, in increasing order.
+        Args:
+            shard (tuple): (k, n) to take only the k-th of n contiguous slices
+            sample (int): Draw this many combinations at random from the (sharded) range
+            seed (int): Random seed for `sample`
+        Returns:
+            iterable: Combination numbers.
+        """
+        start, stop = 0, self.size
+        if shard:
+            k, n = shard
+            if not 0 <= k < n:
+                raise ValueError(f"shard {k} is not in 0..{n - 1}")
+            start, stop = self.size * k // n, self.size * (k + 1) // n
+        if sample is None:
+            return range(start, stop)
+        return selection_sample(start, stop, sample, random.Random(seed))
+
+    def render(self, langs=("en",), shard=None, sample=None, seed=0, stats=None):
+        """
+        Render the combinations one at a time.
+        Args:
+            langs (tuple): Languages to render each combination in
+            shard, sample, seed: See `indices`
+            stats (dict): Optional; kept up to date with variants, sections_rendered and sections_reused
+        Yields:
+            tuple: (combination number, lang, prompt); the prompt equals `generate_prompt(form_at(index), lang)`.
+        """
+        langs = tuple("zh" if lang == "zh" else "en" for lang in langs)
+        position = {field: i for i, field in enumerate(self.fields)}
+        # Position of the fastest-changing sweep field each section reads; -1 if it reads none
+        deepest = [max((position[f] for f in SECTION_INPUTS[key] if f in position), default=-1) for key in SECTION_KEYS]
+        templates = {lang: [SECTION_TEMPLATES[lang][key] for key in SECTION_KEYS] for lang in langs}
+        texts = {lang: [None] * len(SECTION_KEYS) for lang in langs}
+        radix = [len(values) for values in self.values]
+        stats = stats if stats is not None else {}
+        stats.update(variants=0, sections_rendered=0, sections_reused=0)
+        form = dict(self.base)
+        digits = None
+        previous = None
+        for index in self.indices(shard, sample, seed):
+            # `changed` is the first field position that moved; -1 means everything is new
+            if previous is None:
+                digits = self.digits(index)
+                changed = -1
+            elif index == previous + 1:
+                # Next combination: advance like an odometer instead of decoding the number
+                changed = len(digits) - 1
+                while changed >= 0:
+                    digits[changed] += 1
+                    if digits[changed] < radix[changed]:
+                        break
+                    digits[changed] = 0
+                    changed -= 1
+            else:
+                new_digits = self.digits(index)
+                changed = next((p for p, (a, b) in enumerate(zip(digits, new_digits)) if a != b), len(digits))
+                digits = new_digits
+            previous = index
+            for p in range(max(changed, 0), len(digits)):
+                form[self.fields[p]] = self.values[p][digits[p]]
+            for lang in langs:
+                sections = texts[lang]
+                for i, template in enumerate(templates[lang]):
+                    # Only sections reading a field that moved are rendered again
+                    if changed < 0 or deepest[i] >= changed:
+                        sections[i] = render_template(template, form, lang)
+                        stats["sections_rendered"] += 1
+                    else:
+                        stats["sections_reused"] += 1
+                stats["variants"] += 1
+                yield index, lang, SECTION_SEPARATOR.join(sections)
+
+
+def parse_shard(value):
+    k, _, n = value.partition("/")
+    try:
+        k, n = int(k), int(n)
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected K/N, e.g. 0/4")
+    if not 0 <= k < n:
+        raise argparse.ArgumentTypeError(f"shard {k} is not in 0..{n - 1}")
+    return k, n
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m variants",
+        description="Render every combination of per-field candidate values as JSONL {index, lang, prompt}.",
+    )
+    parser.add_argument("sweep", help="Sweep JSON file with 'candidates' and optional 'base'")
+    parser.add_argument("--lang", nargs="+", choices=("en", "zh"), default=["en"], help="Languages to render")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or '-' for stdout (default)")
+    parser.add_argument("--shard", type=parse_shard, metavar="K/N", help="Render only the K-th of N equal slices (0-based)")
+    parser.add_argument("--sample", type=int, help="Render this many random combinations (of the shard)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for --sample")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    with open(args.sweep, encoding="utf-8") as f:
+        spec = json.load(f)
+    sweep = VariantSweep(spec.get("candidates", {}), spec.get("base"))
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    stats = {}
+    try:
+        for index, lang, prompt in sweep.render(args.lang, args.shard, args.sample, args.seed, stats):
+            out.write(json.dumps({"index": index, "lang": lang, "prompt": prompt}, ensure_ascii=False))
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(
+        f"Rendered {stats['variants']} of {sweep.size * len(args.lang)} variants; "
+        f"{stats['sections_reused']} sections reused, {stats['sections_rendered']} rendered",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import streamlit as st
+
+import instrumentation
+from i18n import ACTION_TYPE_INDEX, ACTION_TYPE_KEYS, ACTION_TYPE_LABELS, ACTION_TYPES_BY_KEY, ACTION_TYPES_I18N
+from views.live import finish_fragment, holding_session, seed_widget, widget_value
+
+# Actions drawn at once; longer lists are split into pages
+ACTIONS_PER_PAGE = 20
+
+# "Type: value" prefixes accepted by bulk import, in either language
+BULK_PREFIXES = {
+    name.lower(): t["type"]
+    for types in ACTION_TYPES_I18N.values()
+    for t in types
+    for name in (t["type"], t["label"])
+}
+
+
+def new_action(action_type=None, value=""):
+    """Create an action with an ID that stays the same when other actions are added or removed."""
+    seq = st.session_state.get("_action_seq", 0) + 1
+    st.session_state["_action_seq"] = seq
+    return {"id": f"a{seq}", "type": action_type or ACTION_TYPE_KEYS[0], "value": value}
+
+
+def ensure_ids(actions):
+    """Give actions loaded from elsewhere (reset, import, saved records) an ID."""
+    for action in actions:
+        if "id" not in action:
+            action["id"] = new_action()["id"]
+
+
+def parse_bulk_actions(text):
+    """
+    Parse pasted actions, one per line, optionally prefixed with their type.
+    Args:
+        text (str): Lines like "Lookup: LLM basics", "瀏覽：https://..." or just "market trend"
+    Returns:
+        list: (type, value) pairs; lines without a known prefix are searches.
+    """
+    parsed = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        head, sep, rest = line.replace("：", ":", 1).partition(":")
+        action_type = BULK_PREFIXES.get(head.strip().lower()) if sep else None
+        if action_type and rest.strip():
+            parsed.append((action_type, rest.strip()))
+        else:
+            parsed.append((ACTION_TYPE_KEYS[0], line))
+    return parsed
+
+
+def _actions():
+    return st.session_state["form_data"]["action"]
+
+
+def add_action():
+    _actions().append(new_action())
+    # Jump to the page holding the new action
+    st.session_state["action_page"] = (len(_actions()) - 1) // ACTIONS_PER_PAGE + 1
+
+
+def remove_action(action_id):
+    st.session_state["form_data"]["action"] = [a for a in _actions() if a["id"] != action_id]
+
+
+def import_actions():
+    actions = _actions()
+    # A single untouched empty action is replaced rather than kept
+    if len(actions) == 1 and not actions[0].get("value", "").strip():
+        actions.clear()
+    actions.extend(new_action(t, v) for t, v in parse_bulk_actions(st.session_state.get("bulk_actions", "")))
+    if not actions:
+        actions.append(new_action())
+    st.session_state["bulk_actions"] = ""
+    st.session_state["action_page"] = (len(actions) - 1) // ACTIONS_PER_PAGE + 1
+
+
+@st.fragment
+@holding_session
+def render(lang):
+    """
+    Draw the action list editor. It is a fragment, so editing, adding or
+    removing an action reruns only this editor; the preview is updated through
+    `live.finish_fragment`. Only one page of actions is drawn at a time.
+    """
+    type_configs = ACTION_TYPES_BY_KEY[lang]
+    default_type = ACTION_TYPE_KEYS[0]
+    # initialize as list of dict
+    if "action" not in st.session_state["form_data"] or not isinstance(st.session_state["form_data"]["action"], list):
+        st.session_state["form_data"]["action"] = [new_action()]
+    actions = st.session_state["form_data"]["action"]
+    ensure_ids(actions)
+    n = len(actions)
+
+    pages = (n - 1) // ACTIONS_PER_PAGE + 1
+    if st.session_state.get("action_page", 1) > pages:
+        st.session_state["action_page"] = pages
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Page (of {pages})" if lang == "en" else f"頁數（共 {pages} 頁）",
+            min_value=1,
+            max_value=pages,
+            key="action_page",
+        )
+    first = (page - 1) * ACTIONS_PER_PAGE
+    for i in range(first, min(n, first + ACTIONS_PER_PAGE)):
+        action = actions[i]
+        action_id = action["id"]
+        c1, c2 = st.columns([8,1])
+        with c1:
+            # select Action type
+            action_type_label = (
+                f"no.{i+1} Action Type" if lang == "en" else f"第 {i+1} 個行動類型"
+            )
+            type_key, value_key = f"action_type_{action_id}", f"action_value_{action_id}"
+            action_type = action.get("type", default_type)
+            seed_widget(type_key, action_type if action_type in ACTION_TYPE_INDEX else default_type)
+            selected_type = st.selectbox(
+                label=action_type_label,
+                options=ACTION_TYPE_KEYS,
+                format_func=ACTION_TYPE_LABELS[lang].get,
+                key=type_key
+            )
+            action["type"] = widget_value(type_key, selected_type)
+            # get corresponding description and placeholder
+            type_config = type_configs.get(selected_type, type_configs[default_type])
+            seed_widget(value_key, action.get("value", ""))
+            action["value"] = widget_value(value_key, st.text_area(
+                label=f"{type_config['input_label']}",
+                placeholder=type_config["placeholder"],
+                help=type_config["desc"],
+                key=value_key
+            ))
+        with c2:
+            if n > 1:
+                remove_label = "🗑️ Remove" if lang == "en" else "🗑️ 刪除"
+                st.button(remove_label, key=f"remove_action_{action_id}", on_click=remove_action, args=(action_id,))
+    add_label = "✅ Add Action" if lang == "en" else "✅ 新增行動"
+    st.button(add_label, key="add_action", on_click=add_action)
+
+    bulk_label = "Bulk import" if lang == "en" else "批次匯入"
+    if st.checkbox(bulk_label, key="show_bulk_actions"):
+        st.text_area(
+            "One action per line, optionally prefixed with its type (e.g. `Lookup: LLM basics`)"
+            if lang == "en" else "每行一個行動，可加上類型前綴（例如：`查找：LLM 基本觀念`）",
+            key="bulk_actions",
+        )
+        st.button("📥 Import" if lang == "en" else "📥 匯入", key="import_actions", on_click=import_actions)
+
+    # On its own reruns this fragment cannot redraw the preview, so it pushes the change to it
+    finish_fragment(lang, "action_feed")
+    instrumentation.count("action_editor_runs")
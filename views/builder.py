@@ -0,0 +1,142 @@
+import streamlit as st
+
+import instrumentation
+from i18n import (
+    ACTION_SECTION,
+    APP_I18N,
+    EMPTY_FORM,
+    FIELDS_BY_SECTION,
+    SECTION_BASES,
+)
+from preview import prompt_preview
+from session_memory import SPILL_BYTES, BlobHandle, resolve, resolved_form, spill
+from utils import SECTION_SEPARATOR, render_sections, section_cache_info
+from views import actions, library
+from views.live import account_memory, finish_fragment, holding_session, seed_widget, widget_value
+
+
+def set_editing(key, editing):
+    st.session_state[f"_editing_{key}"] = editing
+
+
+def render_text_field(field, lang):
+    """
+    Draw one text field. A value large enough to be spilled to disk (see
+    session_memory) is shown as a summary with an Edit button, so no widget
+    holds a copy of it while it is not being edited.
+    """
+    key = field["key"]
+    value = st.session_state["form_data"][key]
+    editing = st.session_state.get(f"_editing_{key}", False)
+    if isinstance(value, BlobHandle) and value.length >= SPILL_BYTES and not editing:
+        st.markdown(f"**{field['title']}**")
+        st.caption(
+            f"📄 {value.length:,} characters, kept on disk: {value.head}…" if lang == "en"
+            else f"📄 {value.length:,} 字，已存到磁碟：{value.head}…"
+        )
+        st.button("✏️ Edit" if lang == "en" else "✏️ 編輯", key=f"edit_{key}", on_click=set_editing, args=(key, True))
+        return
+    seed_widget(key, value, load=resolve)
+    text = st.text_area(
+        label=field["title"],
+        placeholder=field["placeholder"],
+        help=field["description"],
+        key=key
+    )
+    if len(text) >= SPILL_BYTES:
+        # Keep a freshly pasted document open until the user is done with it
+        st.session_state[f"_editing_{key}"] = True
+        st.button("✅ Done" if lang == "en" else "✅ 完成", key=f"done_{key}", on_click=set_editing, args=(key, False))
+    st.session_state["form_data"][key] = widget_value(key, spill(text))
+
+
+def render_fields(lang, base_section):
+    """Draw the text fields of one section."""
+    for field in FIELDS_BY_SECTION[lang][base_section]:
+        if field["key"] == "structure":
+            # add selection toggle for optional structure
+            structure_toggle_label = "Specify Output Structure" if lang == "en" else "指定輸出結構"
+            if f"show_structure_{base_section}" not in st.session_state:
+                st.session_state[f"show_structure_{base_section}"] = False
+            toggle_key = f"structure_toggle_{base_section}"
+            seed_widget(toggle_key, st.session_state[f"show_structure_{base_section}"])
+            show_structure = st.checkbox(structure_toggle_label, key=toggle_key)
+            st.session_state[f"show_structure_{base_section}"] = widget_value(toggle_key, show_structure)
+            if show_structure:
+                render_text_field(field, lang)
+            else:
+                st.session_state["form_data"][field["key"]] = ""
+        else:
+            render_text_field(field, lang)
+
+
+@st.fragment
+@holding_session
+def render_section(lang, base_section, feed_key):
+    """
+    Draw one input section. It is a fragment, so typing in it reruns only the
+    section; the edit reaches the preview through its feed frame.
+    """
+    render_fields(lang, base_section)
+    finish_fragment(lang, feed_key)
+    instrumentation.count("section_runs")
+
+
+@st.fragment
+@holding_session
+def render_preview(lang):
+    """
+    Draw the preview column. It is a fragment of its own: hiding the preview
+    reruns only this column, while Reset reruns the page to clear the fields.
+    """
+    ui = APP_I18N[lang]
+    st.subheader(ui["preview_header"])
+    show_preview = st.checkbox(ui["show_preview"], value=True)
+    # Sections are cached on their own inputs, so an edit only rebuilds the section it touches
+    cache_hits = section_cache_info()["hits"]
+    sections = render_sections(resolved_form(st.session_state["form_data"]), lang=lang)
+    instrumentation.count("section_cache_hits", section_cache_info()["hits"] - cache_hits)
+    if instrumentation.ENABLED:
+        instrumentation.count("rendered_bytes", len(SECTION_SEPARATOR.join(sections).encode("utf-8")))
+    instrumentation.lap("render")
+    if show_preview:
+        if st.button(ui["reset_btn"]):
+            st.session_state["form_data"] = dict(EMPTY_FORM[lang])
+            st.rerun()
+        # Preview, copy and download share one buffer in the browser
+        prompt_preview(
+            sections,
+            file_name=f"generated_prompt_{lang}.txt",
+            labels=ui["preview_labels"],
+        )
+    instrumentation.lap("preview")
+
+
+@holding_session
+def render(lang):
+    """
+    Draw the Build Prompt page: parameter input (left) and preview (right)
+    together. Every input section and the preview column are fragments, so
+    only switching the language or the page reruns all of them.
+    """
+    # Fragments feed the preview only on their own reruns; on a full rerun it is redrawn below
+    st.session_state["_builder_full_run"] = True
+    # st.rerun() and errors leave through here too; a stale flag would stop fragments feeding the preview
+    try:
+        left, right = st.columns([1.5, 1], gap="large")
+        with left:
+            st.subheader(APP_I18N[lang]["fill_header"])
+            with st.expander(APP_I18N[lang]["library_labels"]["header"], expanded=False):
+                library.render(lang)
+            for i, (section, base_section) in enumerate(SECTION_BASES[lang]):
+                with st.expander(f"{section}", expanded=False):
+                    if base_section == ACTION_SECTION[lang]:
+                        actions.render(lang)
+                    else:
+                        render_section(lang, base_section, f"section_feed_{i}")
+        instrumentation.lap("sections")
+        with right:
+            render_preview(lang)
+    finally:
+        st.session_state["_builder_full_run"] = False
+    account_memory(lang)
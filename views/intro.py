@@ -0,0 +1,20 @@
+import streamlit as st
+
+import instrumentation
+from i18n import STRUCTURE_ITEMS, USAGE_TIPS
+
+
+def render(lang):
+    """Draw the Intro page: the five prompt sections and usage tips."""
+    # Visually enhanced structure explanation (1x5 columns with icons)
+    st.divider()
+    cols = st.columns(5)
+    for i, item in enumerate(STRUCTURE_ITEMS[lang]):
+        with cols[i]:
+            st.markdown(f"<div style='text-align:center;font-size:2rem'>{item['icon']}</div>", unsafe_allow_html=True)
+            st.markdown(f"<div style='text-align:center;font-weight:bold;font-size:1.1rem'>{item['title']}</div>", unsafe_allow_html=True)
+            st.markdown(f"<div style='text-align:center;color:#666;font-size:0.95rem'>{item['desc']}</div>", unsafe_allow_html=True)
+    # Usage tips below
+    st.markdown("---")
+    st.markdown(USAGE_TIPS[lang])
+    instrumentation.lap("intro")
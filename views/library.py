@@ -0,0 +1,72 @@
+import time
+
+import streamlit as st
+
+from i18n import APP_I18N, EMPTY_FORM, STRUCTURE_SECTION
+from prompt_library import PromptLibrary
+from session_memory import resolved_form, spill_form
+from views.actions import ensure_ids, new_action, parse_bulk_actions
+from views.live import holding_session
+
+
+@st.cache_resource
+def get_library():
+    """One library, and so one connection pool, shared by every session of this server."""
+    return PromptLibrary()
+
+
+def save_current(lang):
+    labels = APP_I18N[lang]["library_labels"]
+    get_library().save(resolved_form(st.session_state["form_data"]), st.session_state.get("library_name", ""), lang)
+    st.session_state["library_name"] = ""
+    st.session_state["_library_notice"] = labels["saved"]
+
+
+def load_entry(entry_id, lang):
+    """Replace the builder's form with a saved record."""
+    entry = get_library().get(entry_id)
+    if entry is None:
+        return
+    form = dict(EMPTY_FORM[lang])
+    form.update(entry["form"])
+    action = form.get("action")
+    if isinstance(action, str):
+        action = [new_action(t, v) for t, v in parse_bulk_actions(action)]
+    form["action"] = action or [new_action()]
+    ensure_ids(form["action"])
+    # Large loaded fields start out on disk, collapsed, like pasted ones
+    spill_form(form)
+    for section in STRUCTURE_SECTION.values():
+        st.session_state[f"show_structure_{section}"] = bool(form.get("structure"))
+    st.session_state["form_data"] = form
+    st.session_state["_library_loaded"] = True
+    st.session_state["_library_notice"] = APP_I18N[lang]["library_labels"]["loaded"]
+
+
+@st.fragment
+@holding_session
+def render(lang):
+    """
+    Save the current form, or search the library and load an entry back with
+    one click. It is a fragment, so searching reruns only this panel; loading
+    reruns the whole page to redraw the fields.
+    """
+    labels = APP_I18N[lang]["library_labels"]
+    if st.session_state.pop("_library_loaded", False):
+        st.rerun()
+    notice = st.session_state.pop("_library_notice", None)
+    if notice:
+        st.toast(notice)
+    c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+    c1.text_input(labels["name"], key="library_name")
+    c2.button(labels["save"], key="library_save", on_click=save_current, args=(lang,))
+
+    query = st.text_input(labels["search"], key="library_query", help=labels["search_help"])
+    entries = get_library().search(query)
+    if not entries:
+        st.caption(labels["empty"])
+    for entry in entries:
+        c1, c2 = st.columns([3, 1], vertical_alignment="center")
+        saved = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry["saved"]))
+        c1.markdown(f"**{entry['name'] or '—'}**  \n:gray[{saved} · {entry['lang']}]")
+        c2.button(labels["load"], key=f"library_load_{entry['id']}", on_click=load_entry, args=(entry["id"], lang))
@@ -0,0 +1,132 @@
+import functools
+import threading
+import time
+import uuid
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+import instrumentation
+from i18n import EMPTY_FORM
+from preview import feed_preview
+from session_memory import EVICT_SPILL_BYTES, REGISTRY, resident_bytes, resolved_form, spill, spill_form
+from utils import render_sections
+
+# Fragment reruns record the session's memory at most this often; walking a long form on every keystroke adds up
+ACCOUNT_INTERVAL = 1.0
+
+
+def account_memory(lang):
+    """Record this session's resident text in the process registry and evict idle sessions."""
+    session_id = st.session_state.setdefault("_memory_session", uuid.uuid4().hex)
+    form_data = st.session_state["form_data"]
+    sent = st.session_state.get("_prompt_preview_sent") or {}
+    field_keys = list(EMPTY_FORM[lang])
+    widget_values = [st.session_state.get(key) for key in field_keys]
+    resident = resident_bytes(form_data, sent.get("sections") or (), widget_values)
+    REGISTRY.update(session_id, resident, release_session(form_data, sent, field_keys, session_lock()))
+    REGISTRY.enforce(current=session_id)
+    st.session_state["_memory_accounted"] = time.monotonic()
+    instrumentation.count("session_resident_bytes", resident)
+
+
+def release_session(form_data, sent, field_keys, lock):
+    """
+    Build the `release` callback the registry calls when this session is
+    evicted, usually from another session's rerun. Spilling form_data alone
+    would save nothing while the widgets and the preview still hold the same
+    strings, so it also spills the sections last sent to the preview and
+    drops the text fields' widget state; `seed_widget` fills them back in
+    from the form when the session returns. It only does so when it gets
+    `lock` without waiting, i.e. between the session's runs.
+    Returns:
+        callable: Returns the bytes the session still holds once released, or None if it is running.
+    """
+    # The current session's state, which st.session_state would not reach from another session
+    ctx = get_script_run_ctx()
+    state = ctx.session_state if ctx else {}
+
+    def release():
+        if not lock.acquire(blocking=False):
+            return None
+        try:
+            spill_form(form_data, EVICT_SPILL_BYTES)
+            if sent.get("sections"):
+                sent["sections"] = tuple(spill(s, EVICT_SPILL_BYTES) for s in sent["sections"])
+            seen = state["_widget_values"] if "_widget_values" in state else {}
+            for key in field_keys:
+                seen.pop(key, None)
+                if key in state:
+                    del state[key]
+            return resident_bytes(form_data, sent.get("sections") or ())
+        finally:
+            lock.release()
+
+    return release
+
+
+def session_lock():
+    """
+    The lock this session holds while the builder runs, full runs and
+    fragment reruns alike. Reentrant, as fragments run inside the full run.
+    """
+    return st.session_state.setdefault("_memory_lock", threading.RLock())
+
+
+def holding_session(fn):
+    """Run `fn` holding `session_lock()`. Goes under @st.fragment on the builder's fragments."""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        with session_lock():
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def partial_run():
+    """True while a builder fragment reruns on its own, False during a full rerun of the page."""
+    return not st.session_state.get("_builder_full_run")
+
+
+def seed_widget(key, value, load=None):
+    """
+    Give the keyed widget `key` the form's `value` when it is drawn for the
+    first time or the form changed outside it (reset, library load). Widgets
+    are drawn without `value=`/`index=`, which Streamlit hashes into the
+    widget ID: a fragment is not redrawn after its own edit, so the browser
+    would send the next edit under the old ID and it would be dropped.
+    Args:
+        key (str): Widget key
+        value: The form's current value for it
+        load (callable): Turns `value` into the widget's value; only called when seeding
+    """
+    seen = st.session_state.setdefault("_widget_values", {})
+    if key not in st.session_state or seen.get(key) is not value:
+        st.session_state[key] = load(value) if load else value
+
+
+def widget_value(key, value):
+    """
+    Remember `value`, as stored in the form, as what widget `key` last returned.
+    Returns:
+        The value.
+    """
+    st.session_state["_widget_values"][key] = value
+    return value
+
+
+def finish_fragment(lang, feed_key):
+    """
+    End a builder fragment. On the fragment's own reruns the rest of the page
+    is not executed, so this pushes the edit to the preview and, at most every
+    ACCOUNT_INTERVAL seconds, records the session's memory; on full reruns the
+    builder does both once for the page.
+    Args:
+        lang (str): Current language
+        feed_key (str): Widget key of the fragment's hidden feed frame, unique per fragment
+    """
+    partial = partial_run()
+    sections = render_sections(resolved_form(st.session_state["form_data"]), lang=lang) if partial else ()
+    # The feed frame is drawn on every run, so it stays mounted
+    feed_preview(sections, feed_key=feed_key, active=partial)
+    if partial and time.monotonic() - st.session_state.get("_memory_accounted", 0) >= ACCOUNT_INTERVAL:
+        account_memory(lang)